@@ -1,30 +1,119 @@
+import argparse
+import calendar
+import heapq
+from itertools import islice
 from collections import UserDict
 import re
-import pickle
-from datetime import datetime, timedelta
+import sys
+from datetime import date, datetime, timedelta
 from TagNotes import Note
-from Levenshtein import distance as levenshtein_distance
+try:
+    from Levenshtein import distance as levenshtein_distance
+except ImportError:  # Bez rozszerzenia C korzystamy z algorytmu Myersa w czystym Pythonie
+    from edit_distance import bounded_distance, levenshtein_distance
+else:
+    def bounded_distance(a, b, max_distance):
+        """Returns the distance capped at max_distance + 1; the C extension is fast enough to finish the table."""
+        if abs(len(a) - len(b)) > max_distance:
+            return max_distance + 1
+        return min(levenshtein_distance(a, b), max_distance + 1)
+from edit_distance import NameColumn, np
+from fulltext import TextIndex, tokenize
+from id_allocator import IdAllocator
+from indexes import (
+    ID_BITS, BirthdayIndex, BitmapIndex, BKTree, IdBitmap, KeyIndex, NGramIndex, PhoneTrie, RangeIndex,
+    SortedIntList, SymSpellIndex, bitmap_ids,
+)
+from journal import Journal
+from phonetic import phonetic_key
+
+EMAIL_PATTERN = re.compile(r"^[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+$")
+DATE_PATTERN = re.compile(r"\d{4}-\d\d-\d\d", re.ASCII)
+
+TRANSLITERATION = str.maketrans("ąćęłńóśźż", "acelnoszz")
+
+def search_key(text):
+    """Returns text casefolded and with Polish letters replaced by plain ones, so "Łukasz" matches "lukasz"."""
+    return text.casefold().translate(TRANSLITERATION)
+
+def restore_slots(obj, state):
+    """Sets pickled attributes on a slotted object, also accepting dict state saved before __slots__."""
+    if isinstance(state, tuple):
+        state = state[1]
+    for attribute, value in state.items():
+        setattr(obj, attribute, value)
+
+def without(items, item):
+    """Returns the tuple without the first occurrence of item, raising ValueError like list.remove."""
+    index = items.index(item)
+    return items[:index] + items[index + 1:]
 
 class Field:
     """Base class for entry fields."""
+    __slots__ = ("value",)  # Subclasses that compute the value from their own slots override it with a property
+
     def __init__(self, value):
         self.value = value
 
+    def __getstate__(self):
+        """Returns the stored slots, leaving out value where a subclass computes it."""
+        cls = type(self)
+        return {name: getattr(self, name) for klass in cls.__mro__ for name in klass.__dict__.get("__slots__", ())
+                if not isinstance(getattr(cls, name), property) and hasattr(self, name)}
+
+    __setstate__ = restore_slots
+
 class Name(Field):
-    pass
+    __slots__ = ("text", "key", "sound")  # Search and phonetic keys, computed once per name
+
+    @property
+    def value(self):
+        return self.text
+
+    @value.setter
+    def value(self, value):
+        self.text = value
+        self.key = search_key(value)
+        self.sound = phonetic_key(value)
+
+    def __setstate__(self, state):
+        """Restores a pickled name, computing the keys that older snapshots did not store."""
+        restore_slots(self, state)
+        if not hasattr(self, "key"):
+            self.value = self.text
 
 class Phone(Field):
+    __slots__ = ("number",)  # Nine digits packed into an int
+
     def __init__(self, value):
         if not self.validate_phone(value):
             raise ValueError("Niepoprawny numer telefonu")
         super().__init__(value)
 
+    @property
+    def value(self):
+        return f"{self.number:09d}"
+
+    @value.setter
+    def value(self, value):
+        self.number = int(value)
+
     @staticmethod
     def validate_phone(value):
-        pattern = re.compile(r"^\d{9}$")
-        return pattern.match(value) is not None
+        return len(value) == 9 and value.isascii() and value.isdigit()
+
+    @staticmethod
+    def normalize(value):
+        """Returns the nine digits of a number typed with spaces, dashes or a +48 prefix, or None."""
+        digits = value.strip().replace(" ", "").replace("-", "")
+        for prefix in ("+48", "0048"):
+            if digits.startswith(prefix) and len(digits) == len(prefix) + 9:
+                digits = digits[len(prefix):]
+        return digits if len(digits) == 9 and digits.isascii() and digits.isdigit() else None
 
 class Email(Field):
+    __slots__ = ()
+
     def __init__(self, value):
         if not self.validate_email(value):
             raise ValueError("Niepoprawny adres email")
@@ -32,60 +121,160 @@ class Email(Field):
 
     @staticmethod
     def validate_email(value):
-        pattern = re.compile(r"^[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+$")
-        return pattern.match(value) is not None
+        return EMAIL_PATTERN.match(value) is not None
 
 class Birthday(Field):
+    __slots__ = ("ordinal",)  # Date ordinal, parsed once and reused by birthday queries
+
     def __init__(self, value):
-        if not self.validate_birthday(value):
-            raise ValueError("Niepoprawna data urodzenia")
-        super().__init__(value)
+        try:
+            super().__init__(value)
+        except (TypeError, ValueError):
+            raise ValueError("Niepoprawna data urodzenia") from None
+
+    @property
+    def value(self):
+        return self.date.isoformat()
+
+    @value.setter
+    def value(self, value):
+        self.ordinal = parse_date(value).toordinal()
+
+    @property
+    def date(self):
+        return date.fromordinal(self.ordinal)
 
     @staticmethod
     def validate_birthday(value):
         try:
-            datetime.strptime(value, "%Y-%m-%d")
+            parse_date(value)
             return True
         except ValueError:
             return False
 
+def parse_date(value):
+    """Parses a YYYY-MM-DD date, slicing the common zero-padded form instead of calling strptime."""
+    if DATE_PATTERN.fullmatch(value):
+        return date(int(value[:4]), int(value[5:7]), int(value[8:]))
+    return datetime.strptime(value, "%Y-%m-%d").date()
+
+def validate_many(kind, values):
+    """Validates a whole column of "phone", "email" or "birthday" values at once.
+
+    Returns an error mask: one bool per value, True where the value is invalid.
+    """
+    if kind == "phone":
+        return [not (len(value) == 9 and value.isascii() and value.isdigit()) for value in values]
+    if kind == "email":
+        match = EMAIL_PATTERN.match
+        return [match(value) is None for value in values]
+    if kind == "birthday":
+        structural = DATE_PATTERN.fullmatch
+        mask = []
+        for value in values:
+            if structural(value):
+                # Struktura się zgadza - zostaje tylko sprawdzenie zakresu dnia i miesiąca
+                try:
+                    date(int(value[:4]), int(value[5:7]), int(value[8:]))
+                    mask.append(False)
+                except ValueError:
+                    mask.append(True)
+            else:
+                mask.append(not Birthday.validate_birthday(value))
+        return mask
+    raise ValueError(f"Nieznany rodzaj pola: {kind}")
+
 class Address(Field):
+    # Miasta, kody i kraje powtarzają się w tysiącach wpisów, więc są internowane
+    __slots__ = ("street", "city", "postal_code", "country")
+
     def __init__(self, street, city, postal_code, country):
         self.street = street
-        self.city = city
-        self.postal_code = postal_code
-        self.country = country
-        super().__init__(value=f"{street}, {city}, {postal_code}, {country}")
+        self.city = sys.intern(city)
+        self.postal_code = sys.intern(postal_code)
+        self.country = sys.intern(country)
+
+    @property
+    def value(self):
+        return f"{self.street}, {self.city}, {self.postal_code}, {self.country}"
+
+    def __setstate__(self, state):
+        """Restores a pickled address, interning its components and skipping the value older versions stored."""
+        if isinstance(state, tuple):
+            state = state[1]
+        self.__init__(state["street"], state["city"], state["postal_code"], state["country"])
+
+def postal_code_number(postal_code):
+    """Returns a Polish XX-XXX postal code as a five-digit int, or None for other formats."""
+    if re.fullmatch(r"\d\d-\d{3}", postal_code) is None:
+        return None
+    return int(postal_code[:2] + postal_code[3:])
+
+def postal_code_range(pattern):
+    """Returns the [low, high) range of postal code numbers matching the pattern, or None.
+
+    The pattern is an exact code ("00-950"), a code with trailing digits
+    replaced by "x" ("00-9xx", "00-xxx"), or a prefix ending with "*"
+    ("00-9*", "00*").
+    """
+    text = pattern.strip().lower()
+    match = re.fullmatch(r"(\d\d)-(\d{0,3})(x*)", text)
+    if match and len(match.group(2)) + len(match.group(3)) == 3:
+        digits = match.group(1) + match.group(2)
+    else:
+        match = re.fullmatch(r"(\d{0,2})(?:(?<=\d\d)-(\d{0,3}))?\*", text)
+        if match is None:
+            return None
+        digits = match.group(1) + (match.group(2) or "")
+    scale = 10 ** (5 - len(digits))
+    low = int(digits or 0) * scale
+    return low, low + scale
 
 class Tag:
+    __slots__ = ("name",)
+
     def __init__(self, name):
         self.name = name
 
+    __setstate__ = restore_slots
+
 class Note(Field):
-    pass
+    __slots__ = ()
 
 class Record:
+    # Collections are tuples; empty ones share the () singleton instead of owning a list each
+    __slots__ = ("id", "name", "phones", "emails", "birthday", "address", "tags", "notes", "book")
+
     def __init__(self, name: Name, birthday: Birthday = None):
         self.id = None  # The ID will be assigned by AddressBook
         self.name = name
-        self.phones = []
-        self.emails = []
+        self.phones = ()
+        self.emails = ()
         self.birthday = birthday
         self.address = None  # Add a new property to store the address
-        self.tags = []  # New property to store tags
-        self.notes = []  # New property to store notes
+        self.tags = ()  # New property to store tags
+        self.notes = ()  # New property to store notes
+        self.book = None  # Set by AddressBook so its indexes follow edits
 
     def add_address(self, address: Address):
         """Adds an address."""
+        if self.book is not None and self.address is not None:
+            self.book.field_removed(self, "address", self.address)
         self.address = address
+        if self.book is not None:
+            self.book.field_added(self, "address", address)
 
     def add_phone(self, phone: Phone):
         """Adds a phone number."""
-        self.phones.append(phone)
+        self.phones += (phone,)
+        if self.book is not None:
+            self.book.field_added(self, "phone", phone)
 
     def remove_phone(self, phone: Phone):
         """Removes a phone number."""
-        self.phones.remove(phone)
+        self.phones = without(self.phones, phone)
+        if self.book is not None:
+            self.book.field_removed(self, "phone", phone)
 
     def edit_phone(self, old_phone: Phone, new_phone: Phone):
         """Changes a phone number."""
@@ -94,11 +283,15 @@ class Record:
 
     def add_email(self, email: Email):
         """Adds an email address."""
-        self.emails.append(email)
+        self.emails += (email,)
+        if self.book is not None:
+            self.book.field_added(self, "email", email)
 
     def remove_email(self, email: Email):
         """Removes an email address."""
-        self.emails.remove(email)
+        self.emails = without(self.emails, email)
+        if self.book is not None:
+            self.book.field_removed(self, "email", email)
 
     def edit_email(self, old_email: Email, new_email: Email):
         """Changes an email address."""
@@ -107,21 +300,50 @@ class Record:
 
     def edit_name(self, new_name: Name):
         """Changes the first and last name."""
+        if self.book is not None:
+            self.book.field_removed(self, "name", self.name)
         self.name = new_name
+        if self.book is not None:
+            self.book.field_added(self, "name", new_name)
+
+    def edit_birthday(self, new_birthday: Birthday):
+        """Changes the date of birth."""
+        if self.book is not None and self.birthday is not None:
+            self.book.field_removed(self, "birthday", self.birthday)
+        self.birthday = new_birthday
+        if self.book is not None:
+            self.book.field_added(self, "birthday", new_birthday)
 
     def add_tag(self, tag: Tag):
-        self.tags.append(tag)
+        if self.book is not None:
+            tag = self.book.shared_tag(tag)
+        self.tags += (tag,)
+        if self.book is not None:
+            self.book.field_added(self, "tag", tag)
 
     def remove_tag(self, tag: Tag):
-        self.tags.remove(tag)
+        """Removes a tag, matched by name because records in a book hold the book's shared instance."""
+        tag = next((item for item in self.tags if item.name == tag.name), tag)
+        self.tags = without(self.tags, tag)
+        if self.book is not None:
+            self.book.field_removed(self, "tag", tag)
+
+    def edit_tag(self, old_tag: Tag, new_tag: Tag):
+        """Changes a tag."""
+        self.remove_tag(old_tag)
+        self.add_tag(new_tag)
 
     def add_note(self, note: Note):
         """Adds a note."""
-        self.notes.append(note)
+        self.notes += (note,)
+        if self.book is not None:
+            self.book.field_added(self, "note", note)
 
     def remove_note(self, note: Note):
         """Removes a note."""
-        self.notes.remove(note)
+        self.notes = without(self.notes, note)
+        if self.book is not None:
+            self.book.field_removed(self, "note", note)
 
     def edit_note(self, old_note: Note, new_note: Note):
         """Changes a note."""
@@ -132,12 +354,48 @@ class Record:
         """Returns the number of days to the next birthday."""
         if not self.birthday or not self.birthday.value:
             return "Brak daty urodzenia"
-        today = datetime.now()
-        bday = datetime.strptime(self.birthday.value, "%Y-%m-%d")
-        next_birthday = bday.replace(year=today.year)
-        if today > next_birthday:
-            next_birthday = next_birthday.replace(year=today.year + 1)
-        return (next_birthday - today).days
+        today = date.today()
+        return (next_birthday(self.birthday.date, today) - today).days
+
+    def to_dict(self):
+        """Returns the record as plain JSON-compatible data."""
+        address = self.address
+        return {
+            "id": self.id,
+            "name": self.name.value,
+            "phones": [phone.value for phone in self.phones],
+            "emails": [email.value for email in self.emails],
+            "birthday": self.birthday.value if self.birthday else None,
+            "address": {"street": address.street, "city": address.city, "postal_code": address.postal_code,
+                        "country": address.country} if address else None,
+            "tags": [tag.name for tag in self.tags],
+            "notes": [note.value for note in self.notes],
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """Builds a record from the output of to_dict, validating every field again."""
+        record = cls(Name(data["name"]), Birthday(data["birthday"]) if data.get("birthday") else None)
+        record.id = data.get("id")
+        record.phones = tuple(map(Phone, data.get("phones", ())))
+        record.emails = tuple(map(Email, data.get("emails", ())))
+        if data.get("address"):
+            record.address = Address(**data["address"])
+        record.tags = tuple(map(Tag, data.get("tags", ())))
+        record.notes = tuple(map(Note, data.get("notes", ())))
+        return record
+
+    def __getstate__(self):
+        """Pickles the record without its link to the address book."""
+        state = {attribute: getattr(self, attribute) for attribute in self.__slots__}
+        state["book"] = None
+        return state
+
+    def __setstate__(self, state):
+        """Restores a pickled record, converting the lists used before __slots__ to tuples."""
+        self.book = None
+        for attribute, value in state.items():
+            setattr(self, attribute, tuple(value) if isinstance(value, list) else value)
 
     def __str__(self):
         """Returns a string representation of the entry, including the ID."""
@@ -151,24 +409,367 @@ class Record:
         return f"ID: {self.id}, Imię i nazwisko: {self.name.value}, " \
                f"Telefony: {phones}, Email: {emails}{birthday_str}{days_to_bday_str}{address_str}, Tagi: {tags}{notes_str}"
 
+def next_birthday(born, today):
+    """Returns the date of the next birthday on or after today.
+
+    In non-leap years 29 February birthdays fall on 28 February.
+    """
+    year = today.year
+    while True:
+        day = born.day
+        if born.month == 2 and day == 29 and not calendar.isleap(year):
+            day = 28
+        birthday = date(year, born.month, day)
+        if birthday >= today:
+            return birthday
+        year += 1
+
 class AddressBook(UserDict):
+    INDEX_VERSION = 3  # Raise when the content of an existing index changes, so old snapshots get reindexed
+    MAX_ID = (1 << ID_BITS) - 1  # Phone and range indexes pack the ID into the low ID_BITS bits of a key
+
     def __init__(self):
         super().__init__()
-        self.next_id = 1
-        self.free_ids = set()
+        self.index_version = self.INDEX_VERSION
+        self.ids = IdAllocator()
+        self.sorted_ids = SortedIntList()  # Keys of self.data in ascending order, for cursors
+        self.journal = None  # Set to a Journal to log every change as it happens
+        self.name_index = BKTree(levenshtein_distance)
+        self.name_grams = NGramIndex()  # Trigrams of lowercased names
+        self.name_tokens = SymSpellIndex(bounded_distance)  # Lowercased first and last names
+        self.name_sounds = KeyIndex()  # Phonetic key of the name -> IDs
+        self.members = IdBitmap()  # Every ID in the book, the universe for tag queries
+        self.tag_index = BitmapIndex()  # Tag name -> bitmap of IDs
+        self.tag_registry = {}  # Tag name -> the one Tag instance shared by all records with that tag
+        self.contact_grams = NGramIndex()  # Trigrams of phones and emails
+        self.phone_index = KeyIndex()  # Phone number (int) -> IDs
+        self.email_index = KeyIndex()  # Lowercased email -> IDs
+        self.phone_trie = PhoneTrie()  # Prefix, suffix and infix digit search
+        self.birthdays = BirthdayIndex()
+        self.city_index = KeyIndex()  # Search key of the city -> IDs
+        self.country_index = KeyIndex()  # Search key of the country -> IDs
+        self.postal_codes = RangeIndex()  # XX-XXX postal code as an int -> IDs
+        self.notes_index = TextIndex()  # Notes of each record as one BM25 document
+        self.name_column = None  # (record IDs, NameColumn) built on demand for batch scoring
 
     def add_record(self, record: Record):
         """Adds an entry to the address book with ID management."""
-        while self.next_id in self.data or self.next_id in self.free_ids:
-            self.next_id += 1
-        if self.free_ids:
-            record.id = min(self.free_ids)
-            self.free_ids.remove(record.id)
-        else:
-            record.id = self.next_id
-            self.next_id += 1
-        self.data[record.id] = record
-        print(f"Dodano wpis z ID: {record.id}.")
+        self.place_record(record, self.ids.allocate())
+
+    def add_records(self, records):
+        """Adds many entries at once, reserving their IDs as one block.
+
+        The journal is written once for the whole batch rather than once
+        per record.
+        """
+        records = list(records)
+        for record, record_id in zip(records, self.ids.reserve(len(records))):
+            record.id = record_id
+        self.place_records(records)
+
+    def place_records(self, records):
+        """Stores records under the already allocated IDs set on them and indexes them as one batch."""
+        for record in records:
+            self.data[record.id] = record
+            record.book = self
+            self.index_record(record)
+        self.sorted_ids.update(record.id for record in records)
+        if self.journal is not None and records:
+            self.journal.records_put(records)
+
+    def place_record(self, record, record_id):
+        """Stores the record under an already allocated ID and indexes it."""
+        record.id = record_id
+        self.data[record_id] = record
+        self.sorted_ids.add(record_id)
+        record.book = self
+        self.index_record(record)
+        if self.journal is not None:
+            self.journal.record_put(record)
+
+    def remove_record(self, record_id):
+        """Removes the entry with the given ID and frees the ID for reuse."""
+        record = self.data.pop(record_id)
+        self.ids.release(record_id)
+        self.sorted_ids.remove(record_id)
+        self.unindex_record(record)
+        record.book = None
+        if self.journal is not None:
+            self.journal.record_deleted(record_id)
+        return record
+
+    def __setitem__(self, record_id, record):
+        """Stores the record under the ID through place_record, replacing any record already there."""
+        if not isinstance(record_id, int) or not 1 <= record_id <= self.MAX_ID:
+            raise ValueError(f"ID rekordu musi być liczbą całkowitą od 1 do {self.MAX_ID}")
+        if record_id in self.data:
+            self.remove_record(record_id)
+        self.ids.claim(record_id)
+        self.place_record(record, record_id)
+
+    def __delitem__(self, record_id):
+        """Removes the record through remove_record, so the indexes stay in step."""
+        self.remove_record(record_id)
+
+    def record_changed(self, record):
+        """Logs the new state of an edited record."""
+        if self.journal is not None:
+            self.journal.record_put(record)
+
+    def apply_journal_entry(self, entry):
+        """Replays one journal entry on the book."""
+        op, payload = entry
+        if op == "put" and payload.id in self.data:
+            old_record = self.data[payload.id]
+            self.unindex_record(old_record)
+            old_record.book = None
+            self.data[payload.id] = payload
+            payload.book = self
+            self.index_record(payload)
+        elif op == "put":
+            self.ids.claim(payload.id)
+            self.place_record(payload, payload.id)
+        elif op == "delete" and payload in self.data:
+            self.remove_record(payload)
+        elif op == "rename_tag":
+            self.rename_tag(*payload)
+
+    def index_record(self, record):
+        """Adds all searchable fields of the record to the indexes."""
+        self.index_field(record, "name", record.name)
+        for phone in record.phones:
+            self.index_field(record, "phone", phone)
+        for email in record.emails:
+            self.index_field(record, "email", email)
+        if record.birthday is not None:
+            self.index_field(record, "birthday", record.birthday)
+        if record.address is not None:
+            self.index_field(record, "address", record.address)
+        if record.notes:
+            self.notes_index.update(record.id, [note.value for note in record.notes])
+        record.tags = tuple(map(self.shared_tag, record.tags))
+        for tag in record.tags:
+            self.index_field(record, "tag", tag)
+        self.members.add(record.id)
+
+    def unindex_record(self, record):
+        """Removes all searchable fields of the record from the indexes."""
+        self.unindex_field(record, "name", record.name)
+        for phone in record.phones:
+            self.unindex_field(record, "phone", phone)
+        for email in record.emails:
+            self.unindex_field(record, "email", email)
+        if record.birthday is not None:
+            self.unindex_field(record, "birthday", record.birthday)
+        if record.address is not None:
+            self.unindex_field(record, "address", record.address)
+        self.notes_index.remove(record.id)
+        for tag in record.tags:
+            self.drop_tag(tag.name, record.id)
+        self.members.remove(record.id)
+
+    def field_added(self, record, kind, field):
+        """Updates the indexes and the journal after a field was added to one of the records."""
+        self.index_field(record, kind, field)
+        self.record_changed(record)
+
+    def field_removed(self, record, kind, field):
+        """Updates the indexes and the journal after a field was removed from one of the records."""
+        self.unindex_field(record, kind, field)
+        self.record_changed(record)
+
+    def index_field(self, record, kind, field):
+        """Adds one field of a record to the indexes."""
+        if kind == "name":
+            self.name_column = None
+            self.name_index.add(field.value, record.id)
+            self.name_grams.add(field.key, record.id)
+            for token in field.value.lower().split():
+                self.name_tokens.add(token, record.id)
+            self.name_sounds.add(field.sound, record.id)
+        elif kind == "phone":
+            self.contact_grams.add(field.value, record.id)
+            self.phone_index.add(field.number, record.id)
+            self.phone_trie.add(field.value, record.id)
+        elif kind == "email":
+            self.contact_grams.add(field.value, record.id)
+            self.email_index.add(field.value.lower(), record.id)
+        elif kind == "birthday":
+            self.birthdays.add(field.date, record.id)
+        elif kind == "address":
+            self.city_index.add(search_key(field.city), record.id)
+            self.country_index.add(search_key(field.country), record.id)
+            postal_code = postal_code_number(field.postal_code)
+            if postal_code is not None:
+                self.postal_codes.add(postal_code, record.id)
+        elif kind == "note":
+            self.notes_index.update(record.id, [note.value for note in record.notes])
+        elif kind == "tag":
+            self.tag_index.add(field.name, record.id)
+
+    def unindex_field(self, record, kind, field):
+        """Removes one field of a record from the indexes."""
+        if kind == "name":
+            self.name_column = None
+            self.name_index.remove(field.value, record.id)
+            self.name_grams.remove(field.key, record.id)
+            for token in field.value.lower().split():
+                self.name_tokens.remove(token, record.id)
+            self.name_sounds.remove(field.sound, record.id)
+        elif kind == "phone":
+            self.contact_grams.remove(field.value, record.id)
+            self.phone_index.remove(field.number, record.id)
+            self.phone_trie.remove(field.value, record.id)
+        elif kind == "email":
+            self.contact_grams.remove(field.value, record.id)
+            self.email_index.remove(field.value.lower(), record.id)
+        elif kind == "birthday":
+            self.birthdays.remove(field.date, record.id)
+        elif kind == "address":
+            self.city_index.remove(search_key(field.city), record.id)
+            self.country_index.remove(search_key(field.country), record.id)
+            postal_code = postal_code_number(field.postal_code)
+            if postal_code is not None:
+                self.postal_codes.remove(postal_code, record.id)
+        elif kind == "note":
+            # Notatka jest już usunięta z rekordu - indeksujemy pozostałe od nowa
+            self.notes_index.update(record.id, [note.value for note in record.notes])
+        elif kind == "tag":
+            # Ten sam tag może wystąpić w rekordzie dwa razy - bit zostaje, dopóki rekord go ma
+            if not any(tag.name == field.name for tag in record.tags):
+                self.drop_tag(field.name, record.id)
+
+    def correct_name(self, text):
+        """Returns text with every unknown first or last name replaced by the closest known one, or None.
+
+        None means there was nothing to correct or no close enough name.
+        """
+        words = text.split()
+        corrected = []
+        for word in words:
+            hits = self.name_tokens.lookup(word.lower())
+            if not hits:
+                return None
+            corrected.append(word if hits[0][1] == 0 else hits[0][0].capitalize())
+        return " ".join(corrected) if corrected != words else None
+
+    def sounds_like(self, query, k=None):
+        """Returns up to k (name, distance) pairs for names that sound like the query, closest first."""
+        names = {self.data[record_id].name.value for record_id in self.name_sounds.get(phonetic_key(query))}
+        hits = sorted(((name, levenshtein_distance(query, name)) for name in names), key=lambda hit: (hit[1], hit[0]))
+        return hits[:k] if k is not None else hits
+
+    def fuzzy_names(self, query, max_distance=2, k=None):
+        """Returns up to k (name, distance) pairs within max_distance edits of the query."""
+        hits = self.name_index.search(query, max_distance, k)
+        return [(name, distance) for name, distance, ids in hits]
+
+    FUZZY_FIELDS = {
+        "name": lambda record: (record.name.value,),
+        "email": lambda record: tuple(email.value for email in record.emails),
+        "city": lambda record: (record.address.city,) if record.address else (),
+    }
+
+    def fuzzy_search(self, query, k=10, max_distance=None, fields=("name", "email", "city")):
+        """Returns up to k (record, score) pairs ranked by edit distance to the closest of the fields.
+
+        Matching ignores case. Names are taken from the name index and each
+        distinct name is scored once for all records carrying it; the BK-tree
+        compares names with their case, so its search radius cannot prune here.
+        The k-th best name score so far caps every later distance, and a
+        bounded heap of the k best records does the same for the other fields.
+        Bounded distances skip values whose length alone rules them out; the
+        bit-parallel fallback also stops early, python-Levenshtein does not.
+        """
+        unknown = set(fields) - set(self.FUZZY_FIELDS)
+        if unknown:
+            raise ValueError(f"Nieznane pola: {', '.join(sorted(unknown))}")
+        query = query.lower()
+        scores = {}  # Lowercased value -> (distance capped at bound + 1, bound)
+
+        def distance_to(value, bound):
+            known = scores.get(value)
+            if known is not None and (known[1] is None or known[0] <= known[1]
+                                      or (bound is not None and bound <= known[1])):
+                return known[0]
+            if bound is None:
+                distance = levenshtein_distance(query, value)
+            else:
+                distance = bounded_distance(query, value, bound)
+            scores[value] = (distance, bound)
+            return distance
+
+        name_scores = {}  # Record ID -> distance of its name
+        limit = max_distance  # Worst score that can still make the top k
+        if "name" in fields:
+            counts = {}  # Distance -> number of records whose name has it
+            for name, record_ids in self.name_index.items():
+                distance = distance_to(name.lower(), limit)
+                if limit is not None and distance > limit:
+                    continue
+                name_scores.update(dict.fromkeys(record_ids, distance))
+                counts[distance] = counts.get(distance, 0) + len(record_ids)
+                if len(name_scores) >= k:  # k rekordów ma już imię w tej odległości
+                    total = 0
+                    for limit in sorted(counts):
+                        total += counts[limit]
+                        if total >= k:
+                            break
+        getters = [self.FUZZY_FIELDS[field] for field in fields if field != "name"]
+        if not getters:
+            hits = heapq.nsmallest(k, ((distance, record_id) for record_id, distance in name_scores.items()))
+            return [(self.data[record_id], distance) for distance, record_id in hits]
+
+        heap = []  # (-score, -record_id): the worst kept hit sits on top
+        for record_id in self.sorted_ids:
+            if len(heap) < k:
+                bound = limit
+            else:
+                bound = -heap[0][0] - 1  # Musi być ściśle lepszy od k-tego wyniku
+                if limit is not None:
+                    bound = min(bound, limit)
+                if bound < 0:
+                    break
+            best = name_scores.get(record_id)
+            if best is not None and bound is not None and best > bound:
+                best = None
+            if best is not None and (bound is None or best < bound):
+                bound = best
+            record = self.data[record_id]
+            for getter in getters:
+                for value in getter(record):
+                    distance = distance_to(value.lower(), bound)
+                    if bound is not None and distance > bound:
+                        continue
+                    if best is None or distance < best:
+                        best = distance
+                        if bound is None or distance < bound:
+                            bound = distance
+            if best is None:
+                continue
+            if len(heap) < k:
+                heapq.heappush(heap, (-best, -record_id))
+            else:
+                heapq.heapreplace(heap, (-best, -record_id))
+        hits = sorted((-score, -record_id) for score, record_id in heap)
+        return [(self.data[record_id], score) for score, record_id in hits]
+
+    def score_names(self, query, max_distance=None):
+        """Returns (record IDs, distances) NumPy arrays scoring the query against every name at once.
+
+        Distances above max_distance are reported as max_distance + 1. Requires NumPy.
+        """
+        if self.name_column is None:
+            record_ids = np.fromiter(self.sorted_ids, dtype=np.int64, count=len(self.data))
+            self.name_column = (record_ids, NameColumn(self.data[record_id].name.value
+                                                       for record_id in self.sorted_ids))
+        record_ids, column = self.name_column
+        return record_ids, column.distances(query, max_distance)
+
+    def upcoming_birthdays(self, days=7, today=None):
+        """Returns records with a birthday within the next days, soonest first."""
+        today = today or date.today()
+        return [self.data[record_id] for record_id in self.birthdays.upcoming(today, days)]
 
     def delete_record_by_id(self):
         """Deletes a record based on ID."""
@@ -177,9 +778,8 @@ class AddressBook(UserDict):
 
         try:
             record_id = int(record_id_str)
-            if record_id in self.data:
-                del self.data[record_id]
-                self.free_ids.add(record_id)
+            if record_id in self:
+                self.remove_record(record_id)
                 print(f"Usunięto rekord o ID: {record_id}.")
             else:
                 print("Nie znaleziono rekordu o podanym ID.")
@@ -187,27 +787,172 @@ class AddressBook(UserDict):
             print("Nieprawidłowe ID. Proszę podać liczbę.")
 
     def find_record(self, search_term):
-        """Finds entries containing the exact phrase provided."""
-        found_records = []
-        for record in self.data.values():
-            if search_term.lower() in record.name.value.lower():
-                found_records.append(record)
-                continue
-            for phone in record.phones:
-                if search_term in phone.value:
-                    found_records.append(record)
-                    break
-            for email in record.emails:
-                if search_term in email.value:
-                    found_records.append(record)
-                    break
-        return found_records
+        """Finds entries containing the exact phrase provided.
+
+        A complete phone number or email address is looked up exactly in the
+        hash indexes instead of being searched for as a fragment. Digits with
+        a star, like "601*", "*4521" or "*452*", search phone numbers by
+        prefix, suffix or infix. A postal code or pattern like "00-950" or
+        "00-xxx" searches addresses, and a phrase equal to a city name also
+        finds everyone living there. Entries whose notes contain the phrase
+        as words are found as well.
+        """
+        exact_ids = self.exact_contact_ids(search_term)
+        if exact_ids is not None:
+            return [self.data[record_id] for record_id in sorted(exact_ids)]
+        wildcard = re.match(r"^(\*?)(\d+)(\*?)$", search_term.strip())
+        if wildcard and (wildcard.group(1) or wildcard.group(3)):
+            mode = {("", "*"): "prefix", ("*", ""): "suffix", ("*", "*"): "infix"}[wildcard.group(1, 3)]
+            return self.find_by_phone(wildcard.group(2), mode)
+        if "-" in search_term and postal_code_range(search_term) is not None:
+            return self.find_by_address(postal_code=search_term)
+        key = search_key(search_term)
+        name_ids = self.name_grams.candidates(key)
+        contact_ids = self.contact_grams.candidates(search_term)
+        if name_ids is None or contact_ids is None:
+            # Fraza krótsza niż trigram - przeszukujemy wszystkie wpisy
+            candidates = self.data.values()
+        else:
+            candidates = [self.data[record_id] for record_id in name_ids | contact_ids]
+        found_records = {record.id: record for record in candidates if self.record_matches(record, search_term, key)}
+        for record_id in self.city_index.get(key.strip()):
+            found_records[record_id] = self.data[record_id]
+        for record_id in self.notes_index.phrase_ids(tokenize(search_term)):
+            found_records[record_id] = self.data[record_id]
+        return [found_records[record_id] for record_id in sorted(found_records)]
+
+    def shared_tag(self, tag):
+        """Returns the book's shared instance of the tag, registering a new one if its name is new.
+
+        The shared instance is always the book's own copy, never the caller's
+        object, since rename_tag changes its name in place.
+        """
+        shared = self.tag_registry.get(tag.name)
+        if shared is None:
+            shared = self.tag_registry[tag.name] = Tag(tag.name)
+        return shared
+
+    def drop_tag(self, name, record_id):
+        """Removes the record from the tag's bitmap, forgetting the tag once no record has it."""
+        self.tag_index.remove(name, record_id)
+        if name not in self.tag_index.bitmaps:
+            self.tag_registry.pop(name, None)
+
+    def rename_tag(self, old_name, new_name):
+        """Renames a tag on every record at once.
+
+        All records with a tag share one Tag instance, so renaming changes a
+        single object. Only merging into a name already in use has to visit
+        the records, to swap in the other shared instance. Renaming a tag no
+        record has does nothing.
+        """
+        if old_name == new_name or old_name not in self.tag_registry:
+            return
+        tag = self.tag_registry.pop(old_name)
+        shared = self.tag_registry.get(new_name)
+        if shared is None:
+            tag.name = new_name
+            self.tag_registry[new_name] = tag
+        else:
+            for record_id in bitmap_ids(self.tag_index.bits(old_name)):
+                record = self.data[record_id]
+                record.tags = tuple(shared if item is tag else item for item in record.tags)
+        self.tag_index.rename(old_name, new_name)
+        if self.journal is not None:
+            self.journal.tag_renamed(old_name, new_name)
+
+    def find_notes(self, query, k=None):
+        """Returns up to k records whose notes match the query, best BM25 score first.
+
+        Words are matched after lowercasing and stripping Polish endings;
+        "quoted phrases" must appear word for word in one note.
+        """
+        return [self.data[record_id] for record_id, score in self.notes_index.search(query, k)]
+
+    def find_by_tags(self, all_of=(), any_of=(), none_of=()):
+        """Returns records having all tags of all_of, at least one of any_of and none of none_of, by ID.
+
+        Each tag's IDs are a bitmap, so the whole query is a few big-int
+        AND, OR and AND NOT operations however many records match.
+        """
+        bits = self.members.bits()
+        for name in all_of:
+            bits &= self.tag_index.bits(name)
+        if any_of:
+            bits &= self.union_bits(any_of)
+        if none_of:
+            bits &= ~self.union_bits(none_of)
+        return [self.data[record_id] for record_id in bitmap_ids(bits)]
+
+    def union_bits(self, tag_names):
+        """Returns the bitmap of records having any of the tags."""
+        bits = 0
+        for name in tag_names:
+            bits |= self.tag_index.bits(name)
+        return bits
+
+    def find_by_address(self, city=None, postal_code=None, country=None):
+        """Returns records whose address matches every given component, by ID.
+
+        City and country are compared by search key, so "lodz" finds "Łódź".
+        The postal code may be exact or a pattern accepted by
+        postal_code_range. Only the IDs of the smallest component are
+        walked, so the cost follows the matches rather than the book size.
+        """
+        groups = []
+        if city is not None:
+            groups.append(self.city_index.get(search_key(city)))
+        if country is not None:
+            groups.append(self.country_index.get(search_key(country)))
+        if postal_code is not None:
+            bounds = postal_code_range(postal_code)
+            if bounds is None:
+                raise ValueError(f"Niepoprawny kod pocztowy: {postal_code}")
+            groups.append(set(self.postal_codes.between(*bounds)))
+        if not groups:
+            raise ValueError("Podaj miasto, kod pocztowy lub kraj")
+        smallest = min(groups, key=len)
+        record_ids = [record_id for record_id in smallest if all(record_id in group for group in groups)]
+        return [self.data[record_id] for record_id in sorted(record_ids)]
+
+    def find_by_phone(self, digits, mode="infix"):
+        """Finds entries whose phone number starts with, ends with or contains the digits.
+
+        The mode is "prefix", "suffix" or "infix".
+        """
+        if mode not in ("prefix", "suffix", "infix"):
+            raise ValueError(f"Nieznany tryb wyszukiwania: {mode}")
+        record_ids = getattr(self.phone_trie, mode)(digits)
+        return [self.data[record_id] for record_id in sorted(record_ids)]
+
+    def exact_contact_ids(self, search_term):
+        """Returns IDs of records with exactly this phone or email, or None if the term is neither."""
+        phone = Phone.normalize(search_term)
+        if phone is not None:
+            return self.phone_index.get(int(phone))
+        email = search_term.strip()
+        if Email.validate_email(email):
+            return self.email_index.get(email.lower())
+        return None
+
+    @staticmethod
+    def record_matches(record, search_term, key=None):
+        """Checks whether the phrase occurs in the name, a phone or an email of the record.
+
+        Pass the search key of the phrase when checking many records, so it is computed only once.
+        """
+        if (search_key(search_term) if key is None else key) in record.name.key:
+            return True
+        if any(search_term in phone.value for phone in record.phones):
+            return True
+        return any(search_term in email.value for email in record.emails)
 
     def find_records_by_name(self, name):
         """Finds records that match the given name and surname."""
+        key = search_key(name)
         matching_records = []
         for record_id, record in self.data.items():
-            if name.lower() in record.name.value.lower():
+            if key in record.name.key:
                 matching_records.append((record_id, record))
         return matching_records
 
@@ -226,9 +971,8 @@ class AddressBook(UserDict):
 
         try:
             record_id_to_delete = int(input("Podaj ID rekordu, który chcesz usunąć: "))
-            if record_id_to_delete in self.data:
-                del self.data[record_id_to_delete]
-                self.free_ids.add(record_id_to_delete)  # Add the ID back to the free ID pool
+            if record_id_to_delete in self:
+                self.remove_record(record_id_to_delete)  # Add the ID back to the free ID pool
                 print(f"Usunięto rekord o ID: {record_id_to_delete}.")
             else:
                 print("Nie znaleziono rekordu o podanym ID.")
@@ -243,20 +987,89 @@ class AddressBook(UserDict):
         for name, record in self.data.items():
             print(record)
 
+    def __getstate__(self):
+        """Pickles the book without its open journal."""
+        state = self.__dict__.copy()
+        state["journal"] = None
+        state["name_column"] = None
+        return state
+
+    def __setstate__(self, state):
+        """Restores a pickled book, rebuilding books saved before all of the current indexes existed."""
+        self.__init__()
+        if state.get("index_version") != self.INDEX_VERSION or not self.__dict__.keys() <= state.keys():
+            for record_id, record in sorted(state["data"].items()):
+                record.book = None
+                self.ids.claim(record_id)
+                self.place_record(record, record_id)
+            return
+        self.__dict__.update(state)
+        self.name_index.distance = levenshtein_distance
+        self.name_tokens.distance = bounded_distance
+        for record in self.data.values():
+            record.book = self
+
+    def export_jsonl(self, path, shards=None):
+        """Writes the book as JSON Lines split by ID range into shard files, one process per shard.
+
+        Returns the shard paths; see jsonl.export_jsonl.
+        """
+        import jsonl
+        return jsonl.export_jsonl(self, path, shards)
+
+    def import_jsonl(self, path, workers=None):
+        """Adds the records of JSON Lines shards, parsed in parallel; see jsonl.import_jsonl."""
+        import jsonl
+        return jsonl.import_jsonl(self, path, workers)
+
+    def page_after(self, last_id, page_size):
+        """Returns up to page_size records with IDs greater than last_id, in ID order."""
+        return [self.data[record_id] for record_id in islice(self.sorted_ids.between(last_id + 1), page_size)]
+
+    def cursor(self, page_size=5, token=None):
+        """Returns a new cursor over the records, optionally resuming from a token."""
+        return RecordCursor(self, page_size, token)
+
+    def __iter__(self):
+        """Returns an iterator over the address book records, five per page."""
+        return self.cursor()
+
+class RecordCursor:
+    """Walks an address book in ID order, one page at a time.
+
+    The position is only the last ID returned, so each page costs
+    O(log n + page size) and records added or deleted meanwhile are
+    picked up or skipped without breaking the walk.
+    """
+    def __init__(self, book, page_size=5, token=None):
+        if page_size < 1:
+            raise ValueError("Rozmiar strony musi być dodatni")
+        self.book = book
+        self.page_size = page_size
+        self.last_id = int(token) if token else 0
+
+    @property
+    def token(self):
+        """Returns an opaque token that resumes the walk after the last page."""
+        return str(self.last_id)
+
     def __iter__(self):
-        """Returns an iterator over the address book records."""
-        self.current = 0
         return self
 
     def __next__(self):
-        if self.current < len(self.data):
-            records = list(self.data.values())[self.current:self.current+5]
-            self.current += 5
-            return records
-        else:
+        records = self.book.page_after(self.last_id, self.page_size)
+        if not records:
             raise StopIteration
+        self.last_id = records[-1].id
+        return records
 
 def suggest_correction_name(name_to_edit, matching_records):
+    # Nazwiska brzmiące tak samo jak zapytanie mają pierwszeństwo przed samą odległością edycyjną
+    sound = phonetic_key(name_to_edit)
+    matching_records = [item for item in matching_records if item[1].name.sound == sound] or matching_records
+    if np is not None and len(matching_records) > 1:
+        distances = NameColumn(record.name.value for record_id, record in matching_records).distances(name_to_edit)
+        return matching_records[int(distances.argmin())][1].name.value
     closest_name = min(matching_records, key=lambda x: levenshtein_distance(name_to_edit, x[1].name.value))
     return closest_name[1].name.value
 
@@ -267,6 +1080,12 @@ def edit_record(book):
 
     if not matching_records:
         print("Nie znaleziono pasujących rekordów.")
+        suggestion = book.correct_name(name_to_edit)
+        if suggestion is None:
+            suggestions = book.sounds_like(name_to_edit, k=1) or book.fuzzy_names(name_to_edit, max_distance=2, k=1)
+            suggestion = suggestions[0][0] if suggestions else None
+        if suggestion:
+            print(f"Czy chodziło Ci o: {suggestion} - dla imienia i nazwiska?")
         return
 
     if len(matching_records) > 1:
@@ -344,7 +1163,7 @@ def edit_record(book):
         new_birthday = input("Podaj nową datę urodzenia w formacie YYYY-MM-DD (wciśnij Enter, aby zachować obecną): ")
         if new_birthday.strip():
             try:
-                record.birthday = Birthday(new_birthday)
+                record.edit_birthday(Birthday(new_birthday))
                 print("Data urodzenia zaktualizowana.")
             except ValueError as e:
                 print(f"Błąd: {e}")
@@ -381,7 +1200,11 @@ def edit_record(book):
                 idx = int(tag_to_edit) - 1
                 if 0 <= idx < len(record.tags):
                     new_tag_name = input("Podaj nową nazwę tagu: ")
-                    record.tags[idx].name = new_tag_name
+                    everywhere = input("Zmienić nazwę tego tagu we wszystkich wpisach? (t/n): ")
+                    if everywhere.strip().lower() == "t":
+                        book.rename_tag(record.tags[idx].name, new_tag_name)
+                    else:
+                        record.edit_tag(record.tags[idx], Tag(new_tag_name))
                     print("Tag zaktualizowany.")
                 else:
                     print("Niepoprawny indeks tagu.")
@@ -401,7 +1224,7 @@ def edit_record(book):
                 idx = int(note_to_edit) - 1
                 if 0 <= idx < len(record.notes):
                     new_note_text = input("Podaj nową treść notatki: ")
-                    record.notes[idx].value = new_note_text
+                    record.edit_note(record.notes[idx], Note(new_note_text))
                     print("Notatka zaktualizowana.")
                 else:
                     print("Niepoprawny indeks notatki.")
@@ -413,12 +1236,21 @@ def edit_record(book):
     print("Edycja zakończona pomyślnie.")
 
 def main():
-    book = AddressBook()
-    try:
-        with open("address_book.pickle", "rb") as file:
-            book = pickle.load(file)
-            print("Wczytano dane z poprzedniej sesji.")
-    except FileNotFoundError:
+    parser = argparse.ArgumentParser(description="Książka adresowa")
+    parser.add_argument("--sqlite", metavar="PLIK", help="przechowuj dane w bazie SQLite zamiast w pliku pickle")
+    args = parser.parse_args()
+
+    if args.sqlite:
+        from sqlite_book import SQLiteAddressBook
+        journal = None
+        book = SQLiteAddressBook(args.sqlite)
+    else:
+        journal = Journal("address_book.pickle", AddressBook)
+        book = journal.load()
+        book.journal = journal
+    if len(book):
+        print("Wczytano dane z poprzedniej sesji.")
+    else:
         print("Brak pliku z danymi. Rozpoczynanie nowej książki adresowej.")
 
     while True:
@@ -435,6 +1267,7 @@ def main():
             try:
                 record = create_record()
                 book.add_record(record)
+                print(f"Dodano wpis z ID: {record.id}.")
             except ValueError as e:
                 print(f"Błąd: {e}")
         elif choice == "2":
@@ -453,9 +1286,11 @@ def main():
         elif choice == "5":
             book.show_all_records()
         elif choice == "6":
-            with open("address_book.pickle", "wb") as file:
-                pickle.dump(book, file)
-                print("Zapisano dane. Do widzenia!")
+            if journal is not None:
+                journal.close()
+            else:
+                book.close()
+            print("Zapisano dane. Do widzenia!")
             break
         else:
             print("Nieprawidłowy wybór. Spróbuj ponownie.")
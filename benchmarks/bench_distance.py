@@ -0,0 +1,63 @@
+"""Benchmark of the edit-distance engines on generated name pairs.
+
+Compares the python-Levenshtein C extension (when installed), Myers'
+bit-parallel algorithm, the banded Ukkonen cut-off and a naive Python DP.
+
+    python benchmarks/bench_distance.py [--pairs 20000] [--max-distance 2]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from edit_distance import bounded_distance, myers_distance
+from generator import generate_rows
+
+
+def naive_distance(a, b):
+    """Full Wagner-Fischer table, one row at a time."""
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, start=1):
+        current = [i]
+        for j, char_b in enumerate(b, start=1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b)))
+        previous = current
+    return previous[-1]
+
+
+def run(name, func, pairs):
+    start = time.perf_counter()
+    for a, b in pairs:
+        func(a, b)
+    seconds = time.perf_counter() - start
+    print(f"{name:<28} {seconds:8.3f} s  {len(pairs) / seconds:12.0f} pairs/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pairs", type=int, default=20_000)
+    parser.add_argument("--max-distance", type=int, default=2)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    names = [row["name"] for row in generate_rows(args.pairs, args.seed)]
+    rnd = random.Random(args.seed)
+    pairs = [(name, rnd.choice(names)) for name in names]
+
+    try:
+        from Levenshtein import distance as c_distance
+    except ImportError:
+        print(f"{'python-Levenshtein (C)':<28} niedostępny")
+    else:
+        run("python-Levenshtein (C)", c_distance, pairs)
+    run("Myers bit-parallel", myers_distance, pairs)
+    run(f"Ukkonen band (k={args.max_distance})",
+        lambda a, b: bounded_distance(a, b, args.max_distance), pairs)
+    run("naive DP", naive_distance, pairs)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""Benchmark of record ID allocation after many deletes.
+
+Fills the allocator with 1M IDs, releases 500k random ones and then
+allocates 1M more, both one by one and through reserve(). The legacy
+min()-over-a-set allocator is timed on a smaller book because it is
+quadratic.
+
+claim() is timed on IDs arriving in random order, as when journal entries
+or imported records carry their own IDs; every jump above next_id leaves a
+gap that must stay allocatable.
+
+The same churn is then run through a whole AddressBook, timing
+remove_record and add_record, which also keep the sorted ID order used by
+cursors.
+
+    python benchmarks/bench_ids.py [--size 1000000] [--legacy-size 20000] [--book-size 1000000]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from AddresBook_Levenshtein import AddressBook, Name, Record
+from id_allocator import IdAllocator
+
+
+class LegacyAllocator:
+    """The ID rule AddressBook.add_record used before IdAllocator."""
+    def __init__(self):
+        self.next_id = 1
+        self.free_ids = set()
+        self.data = set()
+
+    def allocate(self):
+        while self.next_id in self.data or self.next_id in self.free_ids:
+            self.next_id += 1
+        if self.free_ids:
+            item_id = min(self.free_ids)
+            self.free_ids.remove(item_id)
+        else:
+            item_id = self.next_id
+            self.next_id += 1
+        self.data.add(item_id)
+        return item_id
+
+    def release(self, item_id):
+        self.data.discard(item_id)
+        self.free_ids.add(item_id)
+
+
+def run(allocator, size, seed, bulk=False):
+    """Returns seconds spent allocating size IDs after releasing half of the initial ones."""
+    for _ in range(size):
+        allocator.allocate()
+    rnd = random.Random(seed)
+    for item_id in rnd.sample(range(1, size + 1), size // 2):
+        allocator.release(item_id)
+    start = time.perf_counter()
+    if bulk:
+        allocator.reserve(size)
+    else:
+        for _ in range(size):
+            allocator.allocate()
+    return time.perf_counter() - start
+
+
+def run_claims(size, seed):
+    """Returns seconds spent claiming the IDs 1..size in random order and allocating one more."""
+    allocator = IdAllocator()
+    item_ids = list(range(1, size + 1))
+    random.Random(seed).shuffle(item_ids)
+    start = time.perf_counter()
+    for item_id in item_ids:
+        allocator.claim(item_id)
+    assert allocator.allocate() == size + 1
+    return time.perf_counter() - start
+
+
+def run_book(size, churn, seed):
+    """Returns seconds spent removing churn random records from a book of size records and adding churn new ones."""
+    book = AddressBook()
+    name = Name("Jan Kowalski")  # Jedna wspólna nazwa - mierzymy identyfikatory, nie indeksy nazw
+    book.add_records(Record(name) for _ in range(size))
+    rnd = random.Random(seed)
+    start = time.perf_counter()
+    for record_id in rnd.sample(range(1, size + 1), churn):
+        book.remove_record(record_id)
+    removed = time.perf_counter()
+    for _ in range(churn):
+        book.add_record(Record(name))
+    return removed - start, time.perf_counter() - removed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=1_000_000)
+    parser.add_argument("--legacy-size", type=int, default=20_000)
+    parser.add_argument("--book-size", type=int, default=1_000_000)
+    parser.add_argument("--churn", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    heap_time = run(IdAllocator(), args.size, args.seed)
+    print(f"IdAllocator.allocate: {args.size} inserts in {heap_time:.2f} s")
+    bulk_time = run(IdAllocator(), args.size, args.seed, bulk=True)
+    print(f"IdAllocator.reserve:  {args.size} inserts in {bulk_time:.2f} s")
+    legacy_time = run(LegacyAllocator(), args.legacy_size, args.seed)
+    print(f"Legacy min(free_ids): {args.legacy_size} inserts in {legacy_time:.2f} s")
+    claim_time = run_claims(args.size, args.seed)
+    print(f"IdAllocator.claim:    {args.size} shuffled IDs in {claim_time:.2f} s")
+    remove_time, add_time = run_book(args.book_size, args.churn, args.seed)
+    print(f"AddressBook.remove_record: {args.churn} of {args.book_size} in {remove_time:.2f} s")
+    print(f"AddressBook.add_record:    {args.churn} of {args.book_size} in {add_time:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
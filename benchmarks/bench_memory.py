@@ -0,0 +1,101 @@
+"""Memory benchmark: bytes per Record before and after the __slots__ layout.
+
+Builds the same synthetic book twice, once with dict-based copies of the
+original classes and once with the current ones, and reports the memory
+traced per record.
+
+    python benchmarks/bench_memory.py [--size 1000000]
+"""
+import argparse
+import os
+import random
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from AddresBook_Levenshtein import Birthday, Email, Name, Phone, Record, Tag
+from phonetic import phonetic_key
+
+
+class LegacyField:
+    def __init__(self, value):
+        self.value = value
+
+
+class LegacyTag:
+    def __init__(self, name):
+        self.name = name
+
+
+class LegacyRecord:
+    def __init__(self, name, birthday=None):
+        self.id = None
+        self.name = name
+        self.phones = []
+        self.emails = []
+        self.birthday = birthday
+        self.address = None
+        self.tags = []
+        self.notes = []
+
+
+def legacy_record(name, phone, email, birthday, tag):
+    record = LegacyRecord(LegacyField(name), LegacyField(birthday))
+    record.phones.append(LegacyField(phone))
+    record.emails.append(LegacyField(email))
+    if tag:
+        record.tags.append(LegacyTag(tag))
+    return record
+
+
+def slotted_record(name, phone, email, birthday, tag):
+    record = Record(Name(name), Birthday(birthday))
+    record.add_phone(Phone(phone))
+    record.add_email(Email(email))
+    if tag:
+        record.add_tag(Tag(tag))
+    return record
+
+
+def rows(size, seed):
+    """Yields deterministic (name, phone, email, birthday, tag) tuples."""
+    rnd = random.Random(seed)
+    for i in range(size):
+        yield (
+            f"Osoba {i}",
+            f"{rnd.randrange(500_000_000, 900_000_000)}",
+            f"osoba{i}@example.pl",
+            f"{rnd.randint(1950, 2005)}-{rnd.randint(1, 12):02d}-{rnd.randint(1, 28):02d}",
+            "klient" if i % 3 == 0 else None,
+        )
+
+
+def bytes_per_record(factory, size, seed):
+    data = list(rows(size, seed))
+    for row in data:
+        phonetic_key(row[0])  # Zapełniamy pamięć podręczną word_key przed pomiarem, żeby jej nie liczyć
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    records = [factory(*row) for row in data]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del records
+    return (after - before) / size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=1_000_000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    legacy = bytes_per_record(legacy_record, args.size, args.seed)
+    slotted = bytes_per_record(slotted_record, args.size, args.seed)
+    print(f"Records:          {args.size}")
+    print(f"Before (__dict__): {legacy:.0f} B/record")
+    print(f"After (__slots__): {slotted:.0f} B/record ({slotted / legacy:.0%})")
+
+
+if __name__ == "__main__":
+    main()
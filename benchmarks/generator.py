@@ -0,0 +1,124 @@
+"""Deterministic generator of synthetic Polish address-book entries.
+
+    python benchmarks/generator.py --scale 1k
+"""
+import argparse
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from AddresBook_Levenshtein import Address, Birthday, Email, Name, Note, Phone, Record, Tag
+
+SCALES = {"1k": 1_000, "100k": 100_000, "1M": 1_000_000, "10M": 10_000_000}
+
+MALE_NAMES = [
+    "Adam", "Andrzej", "Bartłomiej", "Dawid", "Grzegorz", "Jakub", "Jan", "Jarosław", "Jerzy", "Józef",
+    "Kamil", "Krzysztof", "Łukasz", "Maciej", "Marcin", "Marek", "Mateusz", "Michał", "Paweł", "Piotr",
+    "Przemysław", "Rafał", "Robert", "Sławomir", "Stanisław", "Szymon", "Tomasz", "Wojciech", "Zbigniew",
+]
+FEMALE_NAMES = [
+    "Agata", "Agnieszka", "Aleksandra", "Alicja", "Anna", "Barbara", "Beata", "Danuta", "Dorota", "Elżbieta",
+    "Ewa", "Grażyna", "Halina", "Irena", "Jadwiga", "Joanna", "Justyna", "Katarzyna", "Krystyna", "Łucja",
+    "Magdalena", "Małgorzata", "Maria", "Marta", "Monika", "Natalia", "Urszula", "Zofia", "Żaneta",
+]
+SURNAMES = [
+    "Nowak", "Kowalski", "Wiśniewski", "Wójcik", "Kowalczyk", "Kamiński", "Lewandowski", "Zieliński",
+    "Szymański", "Woźniak", "Dąbrowski", "Kozłowski", "Jankowski", "Mazur", "Kwiatkowski", "Krawczyk",
+    "Piotrowski", "Grabowski", "Nowakowski", "Pawłowski", "Michalski", "Król", "Wieczorek", "Jabłoński",
+    "Wróbel", "Nowicki", "Majewski", "Olszewski", "Stępień", "Malinowski", "Jaworski", "Adamczyk", "Dudek",
+    "Zając", "Górski", "Sikora", "Baran", "Szewczyk", "Ostrowski", "Pietrzak", "Wróblewski", "Jasiński",
+    "Bąk", "Żak", "Chmielewski", "Włodarczyk", "Czarnecki", "Sawicki", "Kubiak", "Szczepański", "Wilk",
+    "Lis", "Mazurek", "Wysocki", "Kaźmierczak", "Cieślak", "Głowacki", "Kołodziej", "Ziółkowski", "Szulc",
+]
+CITIES = [
+    ("Warszawa", (0, 4)), ("Kraków", (30, 31)), ("Łódź", (90, 94)), ("Wrocław", (50, 54)),
+    ("Poznań", (60, 61)), ("Gdańsk", (80, 80)), ("Szczecin", (70, 71)), ("Bydgoszcz", (85, 85)),
+    ("Lublin", (20, 20)), ("Białystok", (15, 15)), ("Katowice", (40, 40)), ("Gdynia", (81, 81)),
+    ("Częstochowa", (42, 42)), ("Toruń", (87, 87)), ("Rzeszów", (35, 35)), ("Kielce", (25, 25)),
+    ("Olsztyn", (10, 10)), ("Opole", (45, 45)), ("Zielona Góra", (65, 65)), ("Gorzów Wielkopolski", (66, 66)),
+]
+STREETS = [
+    "Marszałkowska", "Długa", "Kościuszki", "Mickiewicza", "Słowackiego", "Piłsudskiego", "Żeromskiego",
+    "Sienkiewicza", "Polna", "Leśna", "Ogrodowa", "Lipowa", "Szkolna", "Kwiatowa", "Łąkowa", "Źródlana",
+]
+PHONE_PREFIXES = ["50", "51", "53", "57", "60", "66", "69", "72", "73", "78", "79", "88"]
+EMAIL_DOMAINS = ["wp.pl", "onet.pl", "interia.pl", "o2.pl", "gmail.com", "firma.com.pl"]
+TAGS = ["klient", "dostawca", "rodzina", "znajomi", "praca", "vip", "newsletter"]
+NOTES = [
+    "Oddzwonić w sprawie faktury",
+    "Prosi o kontakt mailowy",
+    "Zamówienie wysłane kurierem",
+    "Reklamacja przyjęta, czeka na decyzję",
+    "Spotkanie przełożone na przyszły tydzień",
+    "Preferuje kontakt telefoniczny po 16:00",
+]
+ASCII = str.maketrans("ąćęłńóśźżĄĆĘŁŃÓŚŹŻ", "acelnoszzACELNOSZZ")
+
+
+def female_surname(surname):
+    """Returns the feminine form of a Polish surname."""
+    if surname.endswith(("ski", "cki", "dzki")):
+        return surname[:-1] + "a"
+    return surname
+
+
+def generate_rows(count, seed=0):
+    """Yields count entries as plain dicts of strings, the same for a given seed."""
+    rnd = random.Random(seed)
+    for i in range(count):
+        if rnd.random() < 0.5:
+            first, last = rnd.choice(MALE_NAMES), rnd.choice(SURNAMES)
+        else:
+            first, last = rnd.choice(FEMALE_NAMES), female_surname(rnd.choice(SURNAMES))
+        login = f"{first}.{last}".translate(ASCII).lower()
+        city, (low, high) = rnd.choice(CITIES)
+        yield {
+            "name": f"{first} {last}",
+            "phones": [rnd.choice(PHONE_PREFIXES) + f"{rnd.randrange(10_000_000):07d}"
+                       for _ in range(rnd.choice((1, 1, 1, 2)))],
+            "emails": [f"{login}{i}@{rnd.choice(EMAIL_DOMAINS)}"] if rnd.random() < 0.8 else [],
+            "birthday": f"{rnd.randint(1940, 2008)}-{rnd.randint(1, 12):02d}-{rnd.randint(1, 28):02d}"
+                        if rnd.random() < 0.7 else "",
+            "street": f"ul. {rnd.choice(STREETS)} {rnd.randint(1, 150)}",
+            "city": city,
+            "postal_code": f"{rnd.randint(low, high):02d}-{rnd.randrange(1000):03d}",
+            "country": "Polska",
+            "tags": rnd.sample(TAGS, rnd.choice((0, 1, 1, 2))),
+            "notes": [rnd.choice(NOTES)] if rnd.random() < 0.3 else [],
+        }
+
+
+def make_record(row):
+    """Builds a Record from a generated row."""
+    record = Record(Name(row["name"]), Birthday(row["birthday"]) if row["birthday"] else None)
+    for phone in row["phones"]:
+        record.add_phone(Phone(phone))
+    for email in row["emails"]:
+        record.add_email(Email(email))
+    record.add_address(Address(row["street"], row["city"], row["postal_code"], row["country"]))
+    for tag in row["tags"]:
+        record.add_tag(Tag(tag))
+    for note in row["notes"]:
+        record.add_note(Note(note))
+    return record
+
+
+def generate_records(count, seed=0):
+    """Yields count deterministic Records."""
+    for row in generate_rows(count, seed):
+        yield make_record(row)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scale", choices=SCALES, default="1k")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    for record in generate_records(SCALES[args.scale], args.seed):
+        print(record)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""Scaling benchmark suite for AddressBook, writing results as JSON.
+
+For every scale it builds a synthetic book with generator.py and times
+add_record, find_record, find_records_by_name, suggest_correction_name,
+fuzzy_search, the batch name scorer (with NumPy), pickle save/load and a
+full paged iteration. Name searches also report how many strings per query
+are copied by str.lower, str.casefold or str.translate, next to the
+lowercase-every-name scan the cached search keys replaced.
+
+    python benchmarks/run_benchmarks.py --scales 1k 100k --output bench_results.json
+"""
+import argparse
+import json
+import os
+import pickle
+import platform
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from AddresBook_Levenshtein import AddressBook, np, suggest_correction_name
+from generator import SCALES, generate_records
+
+
+def timed(results, name, ops, func, *args):
+    """Runs func once, stores its timing under name and returns its result."""
+    start = time.perf_counter()
+    value = func(*args)
+    seconds = time.perf_counter() - start
+    results[name] = {"ops": ops, "seconds": seconds, "ops_per_sec": ops / seconds if seconds else None}
+    return value
+
+
+COPYING_METHODS = {"lower", "casefold", "translate"}
+
+
+def string_copies(func):
+    """Runs func and returns how many new strings str.lower, str.casefold and str.translate made meanwhile."""
+    count = 0
+
+    def profile(frame, event, arg):
+        nonlocal count
+        if event == "c_call" and arg.__name__ in COPYING_METHODS and isinstance(arg.__self__, str):
+            count += 1
+
+    sys.setprofile(profile)
+    try:
+        func()
+    finally:
+        sys.setprofile(None)
+    return count
+
+
+def lowercase_scan(book, name):
+    """find_records_by_name as it was before names cached their search keys."""
+    return [(record_id, record) for record_id, record in book.data.items()
+            if name.lower() in record.name.value.lower()]
+
+
+def make_queries(book, count, seed):
+    """Picks name fragments, phone fragments, email fragments and misspelled names from the book."""
+    rnd = random.Random(seed)
+    records = [book.data[record_id] for record_id in rnd.sample(list(book.sorted_ids), min(count, len(book)))]
+    phrases, names, typos = [], [], []
+    for record in records:
+        name = record.name.value
+        names.append(name.split()[-1][:5])
+        phrases.append(name.split()[0].lower())
+        if record.phones:
+            phrases.append(record.phones[0].value[-4:])
+        if record.emails:
+            phrases.append(record.emails[0].value.split("@")[0])
+        position = rnd.randrange(len(name))
+        typos.append(name[:position] + name[position + 1:])
+    return phrases, names, typos
+
+
+def bench_scale(count, seed, queries):
+    """Returns timings for one book size."""
+    results = {}
+    book = AddressBook()
+    records = list(generate_records(count, seed))
+    timed(results, "add_record", count, lambda: [book.add_record(record) for record in records])
+    del records
+
+    phrases, names, typos = make_queries(book, queries, seed)
+    timed(results, "find_record", len(phrases), lambda: [book.find_record(phrase) for phrase in phrases])
+    timed(results, "find_records_by_name", len(names),
+          lambda: [book.find_records_by_name(name) for name in names])
+    timed(results, "find_records_by_name_lowercase_scan", len(names),
+          lambda: [lowercase_scan(book, name) for name in names])
+    for name, search in (("find_record", lambda: [book.find_record(phrase) for phrase in phrases[:10]]),
+                         ("find_records_by_name", lambda: [book.find_records_by_name(name) for name in names[:10]]),
+                         ("find_records_by_name_lowercase_scan",
+                          lambda: [lowercase_scan(book, name) for name in names[:10]])):
+        results[name]["string_copies_per_query"] = string_copies(search) / min(10, len(names))
+    # Pełne przeszukanie listy kandydatów jest wolne, więc mierzymy tylko kilka zapytań
+    candidates, sample = list(book.data.items()), typos[:10]
+    timed(results, "suggest_correction_name", len(sample),
+          lambda: [suggest_correction_name(typo, candidates) for typo in sample])
+    timed(results, "fuzzy_names", len(typos), lambda: [book.fuzzy_names(typo, 2, 1) for typo in typos])
+    timed(results, "fuzzy_search", len(sample), lambda: [book.fuzzy_search(typo, k=10) for typo in sample])
+    if np is not None:
+        book.score_names("")  # Budowa kolumny nazw nie wchodzi do pomiaru zapytań
+        timed(results, "score_names", len(typos), lambda: [book.score_names(typo, 2) for typo in typos])
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "book.pickle")
+
+        def save():
+            with open(path, "wb") as file:
+                pickle.dump(book, file)
+
+        def load():
+            with open(path, "rb") as file:
+                return pickle.load(file)
+
+        timed(results, "pickle_save", count, save)
+        results["pickle_save"]["bytes"] = os.path.getsize(path)
+        timed(results, "pickle_load", count, load)
+
+    timed(results, "iterate", count, lambda: sum(len(page) for page in book.cursor(page_size=100)))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scales", nargs="+", choices=SCALES, default=["1k", "100k"])
+    parser.add_argument("--queries", type=int, default=100, help="number of sampled records to query for")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="bench_results.json")
+    args = parser.parse_args()
+
+    report = {
+        "created": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "seed": args.seed,
+        "scales": {},
+    }
+    for scale in args.scales:
+        print(f"Skala {scale}...", file=sys.stderr)
+        report["scales"][scale] = bench_scale(SCALES[scale], args.seed, args.queries)
+    with open(args.output, "w", encoding="utf-8") as file:
+        json.dump(report, file, indent=2)
+    print(f"Zapisano wyniki do {args.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
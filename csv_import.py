@@ -0,0 +1,175 @@
+"""Streaming CSV import into an address book, one batch of rows at a time.
+
+    python csv_import.py kontakty.csv --rejected odrzucone.csv
+
+The file needs a header row with a "name" column. The other columns are
+optional: phones, emails, birthday, street, city, postal_code, country,
+tags and notes. Several phones, emails, tags or notes go into one cell
+separated by ";".
+"""
+import argparse
+import csv
+import sys
+import time
+from itertools import islice
+
+from AddresBook_Levenshtein import (
+    Address, AddressBook, Birthday, Email, Name, Note, Phone, Record, Tag, postal_code_number, search_key,
+    validate_many,
+)
+from journal import Journal
+
+COLUMNS = ("name", "phones", "emails", "birthday", "street", "city", "postal_code", "country", "tags", "notes")
+LIST_SEPARATOR = ";"
+BATCH_SIZE = 10_000
+POLAND = {"polska", "poland", "pl"}
+
+
+class ImportReport:
+    """Running totals of an import, updated after every batch."""
+    def __init__(self):
+        self.rows = 0
+        self.imported = 0
+        self.rejected = 0
+        self.seconds = 0.0
+
+    @property
+    def rows_per_sec(self):
+        return self.rows / self.seconds if self.seconds else 0.0
+
+    def __str__(self):
+        return (f"Wiersze: {self.rows}, zaimportowane: {self.imported}, odrzucone: {self.rejected}, "
+                f"{self.rows_per_sec:.0f} wierszy/s")
+
+
+def split_list(cell):
+    """Returns the non-empty items of a ";"-separated cell."""
+    return [item.strip() for item in (cell or "").split(LIST_SEPARATOR) if item.strip()]
+
+
+def check_column(kind, values, owners, errors, message):
+    """Validates one flattened column and records the first error of each row that owns a bad value."""
+    for value, owner, bad in zip(values, owners, validate_many(kind, values)):
+        if bad:
+            errors.setdefault(owner, f"{message}: {value}")
+
+
+def build_batch(rows):
+    """Validates a batch of CSV rows column by column.
+
+    Returns the records built from the valid rows and a dict mapping the
+    position of every rejected row to the reason.
+    """
+    errors = {}
+    phones = [[Phone.normalize(phone) or phone for phone in split_list(row.get("phones"))] for row in rows]
+    emails = [split_list(row.get("emails")) for row in rows]
+    for kind, column, message in (("phone", phones, "Niepoprawny numer telefonu"),
+                                  ("email", emails, "Niepoprawny adres email")):
+        values = [value for cell in column for value in cell]
+        owners = [position for position, cell in enumerate(column) for _ in cell]
+        check_column(kind, values, owners, errors, message)
+    birthdays = [(position, row["birthday"].strip()) for position, row in enumerate(rows)
+                 if (row.get("birthday") or "").strip()]
+    check_column("birthday", [value for position, value in birthdays], [position for position, value in birthdays],
+                 errors, "Niepoprawna data urodzenia")
+
+    for position, row in enumerate(rows):
+        if not (row.get("name") or "").strip():
+            errors.setdefault(position, "Brak imienia i nazwiska")
+        street, city, postal_code, country = ((row.get(column) or "").strip()
+                                              for column in ("street", "city", "postal_code", "country"))
+        if (street or city or postal_code or country) and not (street and city):
+            errors.setdefault(position, "Niepełny adres: brak ulicy lub miasta")
+        elif postal_code and search_key(country) in POLAND and postal_code_number(postal_code) is None:
+            errors.setdefault(position, f"Niepoprawny kod pocztowy: {postal_code}")
+
+    records = []
+    for position, row in enumerate(rows):
+        if position in errors:
+            continue
+        birthday = (row.get("birthday") or "").strip()
+        record = Record(Name(row["name"].strip()), Birthday(birthday) if birthday else None)
+        for phone in phones[position]:
+            record.add_phone(Phone(phone))
+        for email in emails[position]:
+            record.add_email(Email(email))
+        if (row.get("street") or "").strip():
+            record.add_address(Address(row["street"].strip(), row["city"].strip(),
+                                       (row.get("postal_code") or "").strip(), (row.get("country") or "").strip()))
+        for tag in split_list(row.get("tags")):
+            record.add_tag(Tag(tag))
+        for note in split_list(row.get("notes")):
+            record.add_note(Note(note))
+        records.append(record)
+    return records, errors
+
+
+def import_csv(book, path, batch_size=BATCH_SIZE, rejected_path=None, progress=None, encoding="utf-8"):
+    """Streams a CSV file into the book and returns an ImportReport.
+
+    Only one batch of rows is held in memory at a time, so the file size
+    does not matter. Every batch is validated column by column, added with
+    book.add_records (one ID reservation and one journal flush per batch)
+    and reported to progress(report). Rejected rows are written to
+    rejected_path, when given, with the reason in an extra "error" column.
+    """
+    report = ImportReport()
+    start = time.perf_counter()
+    with open(path, newline="", encoding=encoding) as file:
+        reader = csv.DictReader(file)
+        if "name" not in (reader.fieldnames or ()):
+            raise ValueError("Plik CSV nie ma kolumny \"name\"")
+        rejected_file = open(rejected_path, "w", newline="", encoding=encoding) if rejected_path else None
+        try:
+            rejected = None
+            if rejected_file is not None:
+                rejected = csv.DictWriter(rejected_file, list(reader.fieldnames) + ["error"], extrasaction="ignore")
+                rejected.writeheader()
+            while True:
+                rows = list(islice(reader, batch_size))
+                if not rows:
+                    break
+                records, errors = build_batch(rows)
+                book.add_records(records)
+                if rejected is not None:
+                    rejected.writerows({**rows[position], "error": reason} for position, reason in sorted(errors.items()))
+                report.rows += len(rows)
+                report.imported += len(records)
+                report.rejected += len(errors)
+                report.seconds = time.perf_counter() - start
+                if progress is not None:
+                    progress(report)
+        finally:
+            if rejected_file is not None:
+                rejected_file.close()
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("path", help="plik CSV do zaimportowania")
+    parser.add_argument("--sqlite", metavar="PLIK", help="importuj do bazy SQLite zamiast do pliku pickle")
+    parser.add_argument("--rejected", metavar="PLIK", help="zapisz odrzucone wiersze z powodem do pliku CSV")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    args = parser.parse_args()
+
+    if args.sqlite:
+        from sqlite_book import SQLiteAddressBook
+        book = SQLiteAddressBook(args.sqlite)
+    else:
+        journal = Journal("address_book.pickle", AddressBook)
+        book = journal.load()
+        book.journal = journal
+    try:
+        report = import_csv(book, args.path, args.batch_size, args.rejected,
+                            progress=lambda report: print(report, file=sys.stderr))
+    finally:
+        if args.sqlite:
+            book.close()
+        else:
+            journal.close()
+    print(f"Import zakończony. {report}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+"""Edit-distance engines used by the address book's fuzzy matching.
+
+NumPy is an optional dependency (pip install numpy). Without it
+NameColumn and AddressBook.score_names are unavailable and the
+pure-Python engines below are used instead.
+"""
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; batch scoring is unavailable without it
+    np = None
+
+CHUNK_ROWS = 16384  # Names scored per NumPy pass, bounds the temporary matrices
+BAND_LIMIT = 2  # Widest cut-off for which the banded DP beats Myers in pure Python
+
+
+def myers_distance(a, b):
+    """Returns the Levenshtein distance using Myers' bit-parallel algorithm.
+
+    The shorter string is the pattern; each of its positions is one bit of
+    a Python int, so one character of the other string advances a whole DP
+    column in a handful of integer operations (Hyyrö's formulation).
+    """
+    if len(a) < len(b):
+        a, b = b, a
+    length = len(b)
+    if length == 0:
+        return len(a)
+    masks = {}
+    for i, char in enumerate(b):
+        masks[char] = masks.get(char, 0) | (1 << i)
+    full = (1 << length) - 1
+    last = 1 << (length - 1)
+    positive, negative = full, 0
+    score = length
+    for char in a:
+        match = masks.get(char, 0)
+        vertical = match | negative
+        horizontal = (((match & positive) + positive) ^ positive) | match
+        plus = (negative | ~(horizontal | positive)) & full
+        minus = positive & horizontal
+        if plus & last:
+            score += 1
+        elif minus & last:
+            score -= 1
+        plus = ((plus << 1) | 1) & full
+        minus = (minus << 1) & full
+        positive = (minus | ~(vertical | plus)) & full
+        negative = plus & vertical
+    return score
+
+
+def bounded_distance(a, b, max_distance):
+    """Returns the Levenshtein distance if it is at most max_distance, otherwise max_distance + 1.
+
+    Ukkonen's cut-off: only the diagonal band of width 2 * max_distance + 1
+    is computed, and the loop stops as soon as a whole row exceeds the limit.
+    Wider bands are slower in pure Python than Myers' algorithm, which is
+    used for them instead.
+    """
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    if max_distance > BAND_LIMIT:
+        return min(myers_distance(a, b), max_distance + 1)
+    if len(a) > len(b):
+        a, b = b, a
+    limit = max_distance + 1
+    previous = [j if j <= max_distance else limit for j in range(len(b) + 1)]
+    for i, char in enumerate(a, start=1):
+        low = max(1, i - max_distance)
+        high = min(len(b), i + max_distance)
+        current = [limit] * (len(b) + 1)
+        current[0] = i if i <= max_distance else limit
+        best = current[0] if low == 1 else limit
+        for j in range(low, high + 1):
+            cost = previous[j - 1] + (char != b[j - 1])
+            value = min(previous[j] + 1, current[j - 1] + 1, cost, limit)
+            current[j] = value
+            if value < best:
+                best = value
+        if best > max_distance:
+            return limit
+        previous = current
+    return previous[len(b)]
+
+
+levenshtein_distance = myers_distance
+
+
+class NameColumn:
+    """A list of names encoded once as a padded code-point matrix for batch scoring.
+
+    Rows are sorted by name length, so the length cutoff selects one
+    contiguous slice and each chunk is only as wide as its longest name.
+    """
+    def __init__(self, names):
+        if np is None:
+            raise RuntimeError("Batch scoring requires NumPy")
+        names = list(names)
+        lengths = np.fromiter(map(len, names), dtype=np.int32, count=len(names))
+        self.order = np.argsort(lengths, kind="stable")
+        self.lengths = lengths[self.order]
+        width = int(self.lengths[-1]) if len(names) else 0
+        flat = np.frombuffer("".join(names[i] for i in self.order).encode("utf-32-le"), dtype=np.uint32)
+        self.codes = np.full((len(names), width), -1, dtype=np.int32)
+        self.codes[np.arange(width) < self.lengths[:, None]] = flat
+
+    def __len__(self):
+        return len(self.lengths)
+
+    def distances(self, query, max_distance=None):
+        """Returns the Levenshtein distance from query to every name, in the original order.
+
+        With max_distance set, every distance above it is reported as
+        max_distance + 1, and names whose length alone rules them out are
+        never scored.
+        """
+        size = len(self)
+        query_length = len(query)
+        if max_distance is None:
+            result = np.empty(size, dtype=np.int32)
+            start, end = 0, size
+        else:
+            result = np.full(size, max_distance + 1, dtype=np.int32)
+            start = int(np.searchsorted(self.lengths, query_length - max_distance, side="left"))
+            end = int(np.searchsorted(self.lengths, query_length + max_distance, side="right"))
+        query_codes = [ord(char) for char in query]
+        sorted_result = np.empty(size, dtype=np.int32)
+        for chunk_start in range(start, end, CHUNK_ROWS):
+            chunk_end = min(chunk_start + CHUNK_ROWS, end)
+            lengths = self.lengths[chunk_start:chunk_end]
+            codes = self.codes[chunk_start:chunk_end, :int(lengths[-1])]
+            sorted_result[chunk_start:chunk_end] = score_chunk(query_codes, codes, lengths, max_distance)
+        result[self.order[start:end]] = sorted_result[start:end]
+        return result
+
+
+def score_chunk(query_codes, codes, lengths, max_distance):
+    """Runs the Wagner-Fischer recurrence for one query over a block of names at once.
+
+    Each query character updates a whole DP row for every name. The
+    left-to-right insertion dependency is resolved with a running minimum:
+    row[j] = min over k <= j of (tmp[k] + j - k).
+    """
+    rows, width = codes.shape
+    columns = np.arange(width + 1, dtype=np.int16)
+    previous = np.broadcast_to(columns, (rows, width + 1)).copy()
+    alive = np.arange(rows)
+    final = np.empty(rows, dtype=np.int32)
+    current = np.empty_like(previous)
+    for i, code in enumerate(query_codes, start=1):
+        current[:, 0] = i
+        np.minimum(previous[:, 1:] + 1, previous[:, :-1] + (codes != code), out=current[:, 1:])
+        current -= columns
+        np.minimum.accumulate(current, axis=1, out=current)
+        current += columns
+        previous, current = current, previous
+        if max_distance is not None:
+            # Row minima never decrease, so names already past the cutoff can be dropped
+            keep = previous.min(axis=1) <= max_distance
+            if not keep.all():
+                final[alive[~keep]] = max_distance + 1
+                alive, codes, previous = alive[keep], codes[keep], previous[keep]
+                current = np.empty_like(previous)
+                if not len(alive):
+                    return final
+    final[alive] = previous[np.arange(len(alive)), lengths[alive]]
+    if max_distance is not None:
+        np.minimum(final, max_distance + 1, out=final)
+    return final
+
+
+def batch_levenshtein(query, names, max_distance=None):
+    """Returns a NumPy array with the distance from query to each of the names."""
+    return NameColumn(names).distances(query, max_distance)
@@ -0,0 +1,145 @@
+"""Inverted index with BM25 ranking and phrase queries for free text such as notes."""
+import heapq
+import math
+import re
+
+FOLD = str.maketrans("ąćęłńóśźż", "acelnoszz")
+# Końcówki fleksyjne, najdłuższe najpierw; lekki stemmer zamiast pełnej analizy morfologicznej
+SUFFIXES = (
+    "owania", "owie", "ami", "ach", "ego", "emu", "ych", "ymi", "imi", "iej", "owi",
+    "em", "om", "ow", "ie", "ia", "a", "e", "i", "o", "u", "y",
+)
+MIN_STEM = 3
+K1 = 1.2  # BM25 term frequency saturation
+B = 0.75  # BM25 document length normalization
+
+
+def stem(word):
+    """Strips one Polish inflectional ending, keeping at least MIN_STEM letters."""
+    for suffix in SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= MIN_STEM:
+            return word[:-len(suffix)]
+    return word
+
+
+def tokenize(text):
+    """Returns the stemmed terms of the text, casefolded and without Polish letters."""
+    return [stem(word) for word in re.findall(r"\w+", text.casefold().translate(FOLD))]
+
+
+def parse_query(query):
+    """Splits a query into loose terms and "quoted phrases", each phrase a list of terms."""
+    phrases = [tokenize(phrase) for phrase in re.findall(r'"([^"]*)"', query)]
+    terms = tokenize(re.sub(r'"[^"]*"', " ", query))
+    return terms, [phrase for phrase in phrases if phrase]
+
+
+def bm25(candidates, postings, lengths, count, total_length, k=None):
+    """Returns up to k (ID, score) pairs of the candidate IDs ranked with BM25, best first.
+
+    postings maps every query term to {ID: occurrences}, the occurrences
+    being a count or a tuple of positions; lengths maps IDs to their number
+    of terms, and count and total_length describe the whole collection.
+    """
+    scores = dict.fromkeys(candidates, 0.0)
+    average = total_length / count
+    for term, docs in postings.items():
+        if not docs:
+            continue
+        idf = math.log(1 + (count - len(docs) + 0.5) / (len(docs) + 0.5))
+        for item_id in candidates if len(candidates) < len(docs) else docs:
+            occurrences = docs.get(item_id)
+            if occurrences is None or item_id not in scores:
+                continue
+            frequency = occurrences if isinstance(occurrences, int) else len(occurrences)
+            norm = K1 * (1 - B + B * lengths[item_id] / average)
+            scores[item_id] += idf * frequency * (K1 + 1) / (frequency + norm)
+    ranked = scores.items()
+    if k is not None:
+        return heapq.nlargest(k, ranked, key=lambda hit: (hit[1], -hit[0]))
+    return sorted(ranked, key=lambda hit: (-hit[1], hit[0]))
+
+
+class TextIndex:
+    """Positional inverted index over one text document per ID, ranked with BM25.
+
+    A document is a sequence of texts (the notes of a record). Each term
+    keeps the positions where it occurs; consecutive texts are separated
+    by a gap, so a phrase never matches across two of them.
+    """
+    def __init__(self):
+        self.postings = {}  # Term -> {ID: positions}
+        self.lengths = {}  # ID -> number of terms
+        self.terms = {}  # ID -> distinct terms, so removal visits only their postings
+        self.total_length = 0
+
+    def update(self, item_id, texts):
+        """Replaces the document of the ID with the given texts."""
+        self.remove(item_id)
+        positions = {}
+        position = 0
+        for text in texts:
+            for term in tokenize(text):
+                positions.setdefault(term, []).append(position)
+                position += 1
+            position += 1  # Przerwa między notatkami
+        if not positions:
+            return
+        for term, term_positions in positions.items():
+            self.postings.setdefault(term, {})[item_id] = tuple(term_positions)
+        length = position - len(texts)
+        self.lengths[item_id] = length
+        self.terms[item_id] = tuple(positions)
+        self.total_length += length
+
+    def remove(self, item_id):
+        length = self.lengths.pop(item_id, None)
+        if length is None:
+            return
+        self.total_length -= length
+        for term in self.terms.pop(item_id):
+            docs = self.postings[term]
+            del docs[item_id]
+            if not docs:
+                del self.postings[term]
+
+    def search(self, query, k=None):
+        """Returns up to k (ID, score) pairs for the query, best first.
+
+        Loose terms match any document containing at least one of them;
+        every "quoted phrase" must occur in the document word for word.
+        """
+        terms, phrases = parse_query(query)
+        if phrases:
+            candidates = None
+            for phrase in phrases:
+                matching = self.phrase_ids(phrase)
+                candidates = matching if candidates is None else candidates & matching
+            terms += [term for phrase in phrases for term in phrase]
+        else:
+            candidates = set()
+            for term in terms:
+                candidates.update(self.postings.get(term, ()))
+        if not candidates:
+            return []
+        postings = {term: self.postings.get(term) for term in sorted(set(terms))}
+        return bm25(candidates, postings, self.lengths, len(self.lengths), self.total_length, k)
+
+    def phrase_ids(self, phrase):
+        """Returns IDs of documents containing the terms of the phrase one after another."""
+        postings = [self.postings.get(term) for term in phrase]
+        if not postings or not all(postings):
+            return set()
+        rarest = min(postings, key=len)
+        found = set()
+        for item_id in rarest:
+            if not all(item_id in docs for docs in postings):
+                continue
+            starts = set(postings[0][item_id])
+            for offset, docs in enumerate(postings[1:], start=1):
+                starts &= {position - offset for position in docs[item_id]}
+                if not starts:
+                    break
+            else:
+                found.add(item_id)
+        return found
@@ -0,0 +1,91 @@
+"""Record ID allocation for AddressBook."""
+import heapq
+
+
+class IdAllocator:
+    """Hands out record IDs, always reusing the smallest freed ID first.
+
+    Freed IDs live in a min-heap with a companion set, so allocating and
+    releasing are O(log n) instead of a min() over every free ID. Claiming
+    an ID above next_id leaves the skipped IDs free as one [start, end)
+    range in a second heap, however wide the gap; IDs later claimed inside
+    a range are kept in a set and skipped when the range is handed out.
+    """
+    def __init__(self, next_id=1):
+        self.next_id = next_id
+        self.free_heap = []
+        self.free_ids = set()
+        self.gaps = []  # Heap of disjoint [start, end) ranges of free IDs
+        self.gap_claimed = set()  # IDs in use although they lie inside a gap
+        self.gap_free = 0  # Free IDs in all gaps together
+
+    def __setstate__(self, state):
+        """Restores a pickled allocator, adding the gap heap missing from older snapshots."""
+        self.__dict__.update(state)
+        if "gaps" not in state:
+            self.gaps = []
+            self.gap_claimed = set()
+            self.gap_free = 0
+
+    def allocate(self):
+        """Returns the smallest free ID."""
+        while self.free_heap or self.gaps:
+            if self.free_heap and self.free_heap[0] not in self.free_ids:
+                heapq.heappop(self.free_heap)  # Claimed IDs are dropped from the heap lazily
+                continue
+            if self.gaps and (not self.free_heap or self.gaps[0][0] < self.free_heap[0]):
+                gap = self.gaps[0]
+                item_id = gap[0]
+                gap[0] += 1  # Zakresy są rozłączne, więc kopiec zachowuje porządek
+                if gap[0] == gap[1]:
+                    heapq.heappop(self.gaps)
+                if item_id in self.gap_claimed:
+                    self.gap_claimed.remove(item_id)
+                    continue
+                self.gap_free -= 1
+                return item_id
+            item_id = heapq.heappop(self.free_heap)
+            self.free_ids.remove(item_id)
+            return item_id
+        item_id = self.next_id
+        self.next_id += 1
+        return item_id
+
+    def reserve(self, count):
+        """Returns a list of count IDs: freed IDs first, then one fresh contiguous block."""
+        reused = min(count, self.free_count())
+        ids = [self.allocate() for _ in range(reused)]
+        fresh = count - reused
+        ids.extend(range(self.next_id, self.next_id + fresh))
+        self.next_id += fresh
+        return ids
+
+    def release(self, item_id):
+        """Returns an ID to the free pool."""
+        if item_id in self.gap_claimed:
+            self.gap_claimed.remove(item_id)
+            self.gap_free += 1
+        elif item_id < self.next_id and item_id not in self.free_ids:
+            self.free_ids.add(item_id)
+            heapq.heappush(self.free_heap, item_id)
+
+    def claim(self, item_id):
+        """Marks a specific free ID as used, e.g. when replaying a journal."""
+        if item_id in self.free_ids:
+            self.free_ids.remove(item_id)
+        elif item_id >= self.next_id:
+            if item_id > self.next_id:
+                heapq.heappush(self.gaps, [self.next_id, item_id])
+                self.gap_free += item_id - self.next_id
+            self.next_id = item_id + 1
+        elif item_id not in self.gap_claimed:  # Wolny identyfikator poniżej next_id leży w jednej z luk
+            self.gap_claimed.add(item_id)
+            self.gap_free -= 1
+
+    def free_count(self):
+        """Returns the number of free IDs below next_id."""
+        return len(self.free_ids) + self.gap_free
+
+    def __len__(self):
+        """Returns the number of IDs currently in use."""
+        return self.next_id - 1 - self.free_count()
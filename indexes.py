@@ -0,0 +1,545 @@
+"""Search indexes kept alongside AddressBook."""
+import calendar
+from array import array
+from bisect import bisect_left, bisect_right, insort
+
+
+class BKNode:
+    """Single BK-tree node: a word, the IDs carrying it and its children."""
+    def __init__(self, word):
+        self.word = word
+        self.ids = set()
+        self.children = {}
+
+
+class BKTree:
+    """Metric tree over strings used for typo-tolerant name lookups.
+
+    Removing the last ID of a word leaves its node in place as a routing
+    node, so the tree never has to be rebuilt after deletes. Nodes are also
+    kept in a dict by word, so adding or removing an ID of a word already in
+    the tree, the usual case for common names, needs no distance at all.
+    """
+    def __init__(self, distance):
+        self.distance = distance
+        self.root = None
+        self.nodes = {}  # Word -> its node
+
+    def __getstate__(self):
+        """Pickles the tree without its distance function, which the owner sets again on load."""
+        state = self.__dict__.copy()
+        state["distance"] = None
+        return state
+
+    def __setstate__(self, state):
+        """Restores a pickled tree, collecting the word dict for trees saved without it."""
+        self.__dict__.update(state)
+        if "nodes" not in state:
+            self.nodes = {}
+            stack = [self.root] if self.root is not None else []
+            while stack:
+                node = stack.pop()
+                self.nodes[node.word] = node
+                stack.extend(node.children.values())
+
+    def add(self, word, item_id):
+        """Adds an ID under the given word."""
+        node = self.nodes.get(word)
+        if node is not None:
+            node.ids.add(item_id)
+            return
+        if self.root is None:
+            self.root = self.nodes[word] = BKNode(word)
+            self.root.ids.add(item_id)
+            return
+        node = self.root
+        while True:
+            d = self.distance(word, node.word)
+            if d == 0:
+                node.ids.add(item_id)
+                return
+            child = node.children.get(d)
+            if child is None:
+                child = self.nodes[word] = BKNode(word)
+                child.ids.add(item_id)
+                node.children[d] = child
+                return
+            node = child
+
+    def remove(self, word, item_id):
+        """Removes an ID from the given word, if present."""
+        node = self.nodes.get(word)
+        if node is not None:
+            node.ids.discard(item_id)
+
+    def items(self):
+        """Yields (word, ids) for every word that still has IDs, without computing any distance."""
+        for word, node in self.nodes.items():
+            if node.ids:
+                yield word, node.ids
+
+    def search(self, query, max_distance, k=None):
+        """Returns (word, distance, ids) tuples within max_distance, closest first.
+
+        With k set, the search radius shrinks to the k-th best distance found
+        so far, which prunes most of the tree for short result lists.
+        """
+        if self.root is None:
+            return []
+        found = []
+        radius = max_distance
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            d = self.distance(query, node.word)
+            if d <= radius and node.ids:
+                found.append((d, node.word, node.ids))
+                if k is not None and len(found) >= k:
+                    found.sort(key=lambda hit: (hit[0], hit[1]))
+                    del found[k:]
+                    radius = min(radius, found[-1][0])
+            low, high = d - radius, d + radius
+            for edge, child in node.children.items():
+                if low <= edge <= high:
+                    stack.append(child)
+        found.sort(key=lambda hit: (hit[0], hit[1]))
+        if k is not None:
+            del found[k:]
+        return [(word, d, set(ids)) for d, word, ids in found]
+
+
+class NGramIndex:
+    """Inverted index from character n-grams to the IDs whose texts contain them.
+
+    Postings count how many indexed texts of an ID carry a gram, so removing
+    one phone does not hide another phone of the same record.
+    """
+    def __init__(self, n=3):
+        self.n = n
+        self.postings = {}
+
+    def grams(self, text):
+        """Returns the set of n-grams of the text."""
+        return {text[i:i + self.n] for i in range(len(text) - self.n + 1)}
+
+    def add(self, text, item_id):
+        """Indexes the text under the given ID."""
+        for gram in self.grams(text):
+            posting = self.postings.setdefault(gram, {})
+            posting[item_id] = posting.get(item_id, 0) + 1
+
+    def remove(self, text, item_id):
+        """Drops the text previously indexed under the given ID."""
+        for gram in self.grams(text):
+            posting = self.postings.get(gram)
+            if posting is None or item_id not in posting:
+                continue
+            if posting[item_id] > 1:
+                posting[item_id] -= 1
+            else:
+                del posting[item_id]
+                if not posting:
+                    del self.postings[gram]
+
+    def candidates(self, query):
+        """Returns IDs whose texts may contain the query, or None if it is too short to use the index."""
+        grams = self.grams(query)
+        if not grams:
+            return None
+        postings = []
+        for gram in grams:
+            posting = self.postings.get(gram)
+            if not posting:
+                return set()
+            postings.append(posting)
+        postings.sort(key=len)
+        ids = set(postings[0])
+        for posting in postings[1:]:
+            ids = {item_id for item_id in ids if item_id in posting}
+            if not ids:
+                break
+        return ids
+
+
+# Day of year in a leap year, so 29 February gets its own slot (60)
+MONTH_STARTS = [0, 0, 31, 60, 91, 121, 152, 182, 213, 244, 274, 305, 335]
+FEB_28, FEB_29 = 59, 60
+
+
+def birthday_key(day):
+    """Returns the leap-year day of year (1-366) of a date."""
+    return MONTH_STARTS[day.month] + day.day
+
+
+class BirthdayIndex:
+    """Sorted (day of year, ID) pairs answering "whose birthday is coming up"."""
+    def __init__(self):
+        self.entries = []
+
+    def add(self, born, item_id):
+        insort(self.entries, (birthday_key(born), item_id))
+
+    def remove(self, born, item_id):
+        entry = (birthday_key(born), item_id)
+        position = bisect_left(self.entries, entry)
+        if position < len(self.entries) and self.entries[position] == entry:
+            del self.entries[position]
+
+    def between(self, first_key, last_key):
+        """Returns IDs with keys in [first_key, last_key], in key order."""
+        start = bisect_left(self.entries, (first_key,))
+        end = bisect_right(self.entries, (last_key, float("inf")))
+        return [item_id for key, item_id in self.entries[start:end]]
+
+    def upcoming(self, today, days):
+        """Returns IDs with a birthday from today to days ahead, soonest first.
+
+        In non-leap years 29 February birthdays are celebrated on 28 February.
+        """
+        first_key = birthday_key(today)
+        if days >= 365:
+            return self.between(first_key, 366) + self.between(1, first_key - 1)
+        end = today.toordinal() + days
+        end_day = today.fromordinal(end)
+        last_key = birthday_key(end_day)
+        if last_key == FEB_28 and not calendar.isleap(end_day.year):
+            last_key = FEB_29
+        if end_day.year == today.year:
+            return self.between(first_key, last_key)
+        return self.between(first_key, 366) + self.between(1, last_key)
+
+
+class KeyIndex:
+    """Hash index from a key to the IDs carrying it, counting repeats per ID."""
+    def __init__(self):
+        self.postings = {}
+
+    def add(self, key, item_id):
+        posting = self.postings.setdefault(key, {})
+        posting[item_id] = posting.get(item_id, 0) + 1
+
+    def remove(self, key, item_id):
+        posting = self.postings.get(key)
+        if posting is None or item_id not in posting:
+            return
+        if posting[item_id] > 1:
+            posting[item_id] -= 1
+        else:
+            del posting[item_id]
+            if not posting:
+                del self.postings[key]
+
+    def get(self, key):
+        """Returns a set-like view of the IDs carrying the key."""
+        return self.postings.get(key, {}).keys()
+
+
+
+class SortedIntList:
+    """Sorted multiset of non-negative ints kept in small array blocks.
+
+    This is the leaf level of a B+-tree: inserts and removals touch a
+    single block, and a key range is one bisect plus a walk over
+    contiguous keys. Each key costs 8 bytes.
+    """
+    LOAD = 1024
+
+    def __init__(self):
+        self.blocks = []
+        self.maxes = []
+
+    def add(self, key):
+        if not self.blocks:
+            self.blocks.append(array("Q", [key]))
+            self.maxes.append(key)
+            return
+        i = min(bisect_left(self.maxes, key), len(self.maxes) - 1)
+        block = self.blocks[i]
+        insort(block, key)
+        self.maxes[i] = block[-1]
+        if len(block) > 2 * self.LOAD:
+            self.blocks[i:i + 1] = [block[:self.LOAD], block[self.LOAD:]]
+            self.maxes[i:i + 1] = [block[self.LOAD - 1], block[-1]]
+
+    def remove(self, key):
+        i = bisect_left(self.maxes, key)
+        if i == len(self.maxes):
+            return
+        block = self.blocks[i]
+        j = bisect_left(block, key)
+        if j < len(block) and block[j] == key:
+            del block[j]
+            if block:
+                self.maxes[i] = block[-1]
+            else:
+                del self.blocks[i], self.maxes[i]
+
+    def update(self, keys):
+        """Adds many keys; keys above the current maximum are appended as whole blocks."""
+        keys = sorted(keys)
+        if not keys:
+            return
+        if self.blocks and keys[0] <= self.maxes[-1]:
+            for key in keys:
+                self.add(key)
+            return
+        if self.blocks and len(self.blocks[-1]) < self.LOAD:
+            room = self.LOAD - len(self.blocks[-1])
+            self.blocks[-1].extend(keys[:room])
+            self.maxes[-1] = self.blocks[-1][-1]
+            keys = keys[room:]
+        for start in range(0, len(keys), self.LOAD):
+            block = array("Q", keys[start:start + self.LOAD])
+            self.blocks.append(block)
+            self.maxes.append(block[-1])
+
+    def between(self, low, high=None):
+        """Yields keys in [low, high) in ascending order; without high, every key from low on."""
+        i = bisect_left(self.maxes, low)
+        while i < len(self.blocks):
+            block = self.blocks[i]
+            for key in block[bisect_left(block, low):]:
+                if high is not None and key >= high:
+                    return
+                yield key
+            i += 1
+
+    def __iter__(self):
+        for block in self.blocks:
+            yield from block
+
+    def __len__(self):
+        return sum(map(len, self.blocks))
+
+
+PHONE_DIGITS = 9
+ID_BITS = 32
+
+
+def digits_code(digits):
+    """Returns the base-11 code of a digit string padded to PHONE_DIGITS (0 pads, 1-10 are digits)."""
+    code = 0
+    for digit in digits:
+        code = code * 11 + ord(digit) - 47
+    return code * 11 ** (PHONE_DIGITS - len(digits))
+
+
+class PhoneTrie:
+    """Digit tries answering prefix, suffix and infix queries over phone numbers.
+
+    Numbers are stored forwards for prefixes and reversed for suffixes.
+    Infix queries use a third trie holding every proper suffix of each
+    number, so "contains 452" is a prefix walk there plus one in the forward
+    trie.
+
+    Each trie is stored flattened: a string and its ID are packed into one
+    integer whose order is the trie's depth-first order. The leaves under
+    any trie node are then one contiguous key range in a SortedIntList, and
+    a query costs O(log n + hits) at 8 bytes per stored string.
+    """
+    def __init__(self):
+        self.forward = SortedIntList()
+        self.reversed = SortedIntList()
+        self.inner = SortedIntList()
+
+    @staticmethod
+    def key(digits, item_id):
+        return digits_code(digits) << ID_BITS | item_id
+
+    def add(self, number, item_id):
+        self.forward.add(self.key(number, item_id))
+        self.reversed.add(self.key(number[::-1], item_id))
+        for start in range(1, len(number)):
+            self.inner.add(self.key(number[start:], item_id))
+
+    def remove(self, number, item_id):
+        self.forward.remove(self.key(number, item_id))
+        self.reversed.remove(self.key(number[::-1], item_id))
+        for start in range(1, len(number)):
+            self.inner.remove(self.key(number[start:], item_id))
+
+    @staticmethod
+    def ids_with_prefix(keys, digits):
+        if len(digits) > PHONE_DIGITS or not (digits.isascii() and digits.isdigit()):
+            return set()
+        low = digits_code(digits)
+        high = low + 11 ** (PHONE_DIGITS - len(digits))
+        mask = (1 << ID_BITS) - 1
+        return {key & mask for key in keys.between(low << ID_BITS, high << ID_BITS)}
+
+    def prefix(self, digits):
+        """Returns IDs with a number starting with the digits."""
+        return self.ids_with_prefix(self.forward, digits)
+
+    def suffix(self, digits):
+        """Returns IDs with a number ending with the digits."""
+        return self.ids_with_prefix(self.reversed, digits[::-1])
+
+    def infix(self, digits):
+        """Returns IDs with a number containing the digits."""
+        return self.ids_with_prefix(self.forward, digits) | self.ids_with_prefix(self.inner, digits)
+
+
+class RangeIndex:
+    """Int key -> IDs with range queries over the keys.
+
+    Each (key, ID) pair is packed into one int in a SortedIntList, so a key
+    range is a contiguous run and a query costs O(log n + hits).
+    """
+    def __init__(self):
+        self.pairs = SortedIntList()
+
+    def add(self, key, item_id):
+        self.pairs.add(key << ID_BITS | item_id)
+
+    def remove(self, key, item_id):
+        self.pairs.remove(key << ID_BITS | item_id)
+
+    def between(self, low, high):
+        """Yields IDs with a key in [low, high), in key order."""
+        mask = (1 << ID_BITS) - 1
+        for pair in self.pairs.between(low << ID_BITS, high << ID_BITS):
+            yield pair & mask
+
+
+def deletions(word, depth):
+    """Returns the word and every string obtained by deleting up to depth characters."""
+    found = {word}
+    frontier = {word}
+    for _ in range(depth):
+        frontier = {part[:i] + part[i + 1:] for part in frontier for i in range(len(part))}
+        found |= frontier
+    return found
+
+
+class SymSpellIndex:
+    """Deletion-neighbourhood dictionary for typo correction of single words (SymSpell).
+
+    Every indexed word is stored under all its deletions up to max_distance,
+    so looking up a typo is a few hash probes over the typo's own deletions
+    followed by verification of the handful of candidates.
+    """
+    def __init__(self, distance, max_distance=2):
+        self.distance = distance  # Bounded distance: (a, b, limit) -> distance capped at limit + 1
+        self.max_distance = max_distance
+        self.words = KeyIndex()
+        self.deletes = {}
+
+    def __getstate__(self):
+        """Pickles the index without its distance function, which the owner sets again on load."""
+        state = self.__dict__.copy()
+        state["distance"] = None
+        return state
+
+    def add(self, word, item_id):
+        if word not in self.words.postings:
+            for deletion in deletions(word, self.max_distance):
+                self.deletes.setdefault(deletion, set()).add(word)
+        self.words.add(word, item_id)
+
+    def remove(self, word, item_id):
+        self.words.remove(word, item_id)
+        if word in self.words.postings:
+            return
+        for deletion in deletions(word, self.max_distance):
+            words = self.deletes.get(deletion)
+            if words is not None:
+                words.discard(word)
+                if not words:
+                    del self.deletes[deletion]
+
+    def lookup(self, word, max_distance=None):
+        """Returns (word, distance, ID count) for indexed words within max_distance, best first."""
+        if max_distance is None or max_distance > self.max_distance:
+            max_distance = self.max_distance
+        candidates = set()
+        for deletion in deletions(word, max_distance):
+            candidates.update(self.deletes.get(deletion, ()))
+        hits = []
+        for candidate in candidates:
+            distance = self.distance(word, candidate, max_distance)
+            if distance <= max_distance:
+                hits.append((candidate, distance, len(self.words.get(candidate))))
+        hits.sort(key=lambda hit: (hit[1], -hit[2], hit[0]))
+        return hits
+
+
+BIT_POSITIONS = [tuple(bit for bit in range(8) if byte >> bit & 1) for byte in range(256)]
+
+
+class IdBitmap:
+    """A set of small non-negative IDs stored as one bit per ID in a bytearray.
+
+    bits() returns the set as a Python int, so intersections, unions and
+    differences of millions of IDs are single &, | and & ~ operations. The
+    bytearray grows to the largest ID / 8 bytes, which suits the dense IDs
+    handed out by IdAllocator.
+    """
+    def __init__(self):
+        self.data = bytearray()
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def add(self, item_id):
+        byte, mask = item_id >> 3, 1 << (item_id & 7)
+        if byte >= len(self.data):
+            self.data.extend(bytes(byte + 1 - len(self.data)))
+        if not self.data[byte] & mask:
+            self.data[byte] |= mask
+            self.count += 1
+
+    def remove(self, item_id):
+        byte, mask = item_id >> 3, 1 << (item_id & 7)
+        if byte < len(self.data) and self.data[byte] & mask:
+            self.data[byte] &= ~mask
+            self.count -= 1
+
+    def bits(self):
+        return int.from_bytes(self.data, "little")
+
+
+def bitmap_ids(bits):
+    """Returns the IDs whose bits are set in the int, in ascending order."""
+    ids = []
+    for offset, byte in enumerate(bits.to_bytes((bits.bit_length() + 7) // 8, "little")):
+        if byte:
+            base = offset << 3
+            ids.extend(base + bit for bit in BIT_POSITIONS[byte])
+    return ids
+
+
+class BitmapIndex:
+    """Key -> IDs, with the IDs of every key kept as an IdBitmap."""
+    def __init__(self):
+        self.bitmaps = {}
+
+    def add(self, key, item_id):
+        bitmap = self.bitmaps.get(key)
+        if bitmap is None:
+            bitmap = self.bitmaps[key] = IdBitmap()
+        bitmap.add(item_id)
+
+    def remove(self, key, item_id):
+        bitmap = self.bitmaps.get(key)
+        if bitmap is None:
+            return
+        bitmap.remove(item_id)
+        if not bitmap:
+            del self.bitmaps[key]
+
+    def rename(self, key, new_key):
+        """Moves the IDs of key to new_key, merging them with any IDs new_key already has."""
+        bitmap = self.bitmaps.pop(key)
+        target = self.bitmaps.get(new_key)
+        if target is None:
+            self.bitmaps[new_key] = bitmap
+            return
+        for item_id in bitmap_ids(bitmap.bits()):
+            target.add(item_id)
+
+    def bits(self, key):
+        """Returns the IDs of the key as an int bitmap, 0 for an unknown key."""
+        bitmap = self.bitmaps.get(key)
+        return bitmap.bits() if bitmap is not None else 0
@@ -0,0 +1,186 @@
+"""Write-ahead journal and snapshot compaction for AddressBook."""
+import glob
+import os
+import pickle
+import threading
+
+
+class Journal:
+    """Append-only log of address book changes next to a pickle snapshot.
+
+    Every change is appended as a ("put", record), ("delete", record_id) or
+    ("rename_tag", (old_name, new_name)) entry as soon as it happens. Compaction seals the current journal file
+    and, in a background thread, folds the sealed segments into a fresh
+    snapshot on disk without touching the live book. The snapshot records
+    the number of the last segment folded into it, so segments left behind
+    by a crash before their removal are never replayed a second time.
+    """
+    def __init__(self, snapshot_path, factory, journal_path=None, sync=True, compact_after=1000):
+        self.snapshot_path = snapshot_path
+        self.factory = factory
+        self.journal_path = journal_path or snapshot_path + ".journal"
+        self.sync = sync
+        self.compact_after = compact_after
+        self.entries = 0
+        self.lock = threading.Lock()
+        self.compaction_lock = threading.Lock()
+        self.compaction = None
+        self.folded = read_folded(snapshot_path)  # Number of the last segment in the snapshot
+        self.file = open(self.journal_path, "ab")
+
+    def load(self):
+        """Returns the book from the snapshot with the journal tail replayed on top."""
+        book, self.folded = load_snapshot(self.snapshot_path, self.factory)
+        for path in self.sealed_segments(after=self.folded):
+            for entry, offset in read_entries(path):
+                book.apply_journal_entry(entry)
+        valid_size = 0
+        for entry, valid_size in read_entries(self.journal_path):
+            book.apply_journal_entry(entry)
+            self.entries += 1
+        self.file.truncate(valid_size)  # Obcinamy niedokończony ostatni zapis
+        return book
+
+    def record_put(self, record):
+        """Logs the current state of a record."""
+        self.append(("put", record))
+
+    def records_put(self, records):
+        """Logs the current state of many records with a single flush."""
+        self.append_many([("put", record) for record in records])
+
+    def record_deleted(self, record_id):
+        """Logs the deletion of a record."""
+        self.append(("delete", record_id))
+
+    def tag_renamed(self, old_name, new_name):
+        """Logs the renaming of a tag on every record."""
+        self.append(("rename_tag", (old_name, new_name)))
+
+    def append(self, entry):
+        """Writes one entry to the end of the journal."""
+        self.append_many((entry,))
+
+    def append_many(self, entries):
+        """Writes entries to the end of the journal, flushing and syncing once for all of them."""
+        with self.lock:
+            for entry in entries:
+                pickle.dump(entry, self.file)
+            self.file.flush()
+            if self.sync:
+                os.fsync(self.file.fileno())
+            self.entries += len(entries)
+        if self.entries >= self.compact_after:
+            self.compact()
+
+    def sealed_segments(self, after=0):
+        """Returns sealed journal files numbered above after, oldest first."""
+        paths = sorted(glob.glob(glob.escape(self.journal_path) + ".sealed-*"))
+        return [path for path in paths if segment_number(path) > after]
+
+    def seal(self):
+        """Closes the current journal file as a sealed segment and starts a new one."""
+        with self.lock:
+            self.file.close()
+            segments = self.sealed_segments()
+            number = max(segment_number(segments[-1]) if segments else 0, self.folded) + 1
+            os.replace(self.journal_path, f"{self.journal_path}.sealed-{number:06d}")
+            self.file = open(self.journal_path, "ab")
+            self.entries = 0
+
+    def compact(self, wait=False):
+        """Seals the journal and folds it into a new snapshot in a background thread."""
+        if not self.compaction_lock.acquire(blocking=wait):
+            return  # Kompakcja już trwa
+        try:
+            self.seal()
+        except BaseException:
+            self.compaction_lock.release()
+            raise
+        self.compaction = threading.Thread(target=self.fold_segments, daemon=True)
+        self.compaction.start()
+        if wait:
+            self.compaction.join()
+
+    def fold_segments(self):
+        """Rewrites the snapshot with every sealed segment applied, then deletes the segments."""
+        try:
+            book, folded = load_snapshot(self.snapshot_path, self.factory)
+            segments = self.sealed_segments(after=folded)
+            for path in segments:
+                for entry, offset in read_entries(path):
+                    book.apply_journal_entry(entry)
+            if segments:
+                folded = segment_number(segments[-1])
+                write_snapshot(book, self.snapshot_path, folded)
+                self.folded = folded
+            for path in self.sealed_segments():  # Także segmenty pozostawione przez awarię
+                if segment_number(path) <= folded:
+                    os.remove(path)
+        finally:
+            self.compaction_lock.release()
+
+    def close(self, compact=True):
+        """Closes the journal, by default compacting it into the snapshot first."""
+        if compact:
+            self.compact(wait=True)
+        elif self.compaction is not None:
+            self.compaction.join()
+        self.file.close()
+
+
+def segment_number(path):
+    """Returns the number of a sealed journal segment from its file name."""
+    return int(path.rsplit("-", 1)[1])
+
+
+def load_snapshot(path, factory):
+    """Returns (book, last folded segment number) from a snapshot, or a new book from factory and 0.
+
+    Snapshots written before segment numbers were recorded hold just the
+    pickled book and count as having folded nothing.
+    """
+    try:
+        with open(path, "rb") as file:
+            book = pickle.load(file)
+            if isinstance(book, int):
+                return pickle.load(file), book
+            return book, 0
+    except FileNotFoundError:
+        return factory(), 0
+
+
+def read_folded(path):
+    """Returns the last segment number recorded in a snapshot, reading only its first pickle."""
+    try:
+        with open(path, "rb") as file:
+            folded = pickle.load(file)
+    except FileNotFoundError:
+        return 0
+    return folded if isinstance(folded, int) else 0
+
+
+def write_snapshot(book, path, folded=0):
+    """Atomically replaces the snapshot with the last folded segment number and the pickled book."""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as file:
+        pickle.dump(folded, file)
+        pickle.dump(book, file)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(tmp_path, path)
+
+
+def read_entries(path):
+    """Yields (entry, end offset) pairs from a journal file, stopping at a torn last write."""
+    try:
+        file = open(path, "rb")
+    except FileNotFoundError:
+        return
+    with file:
+        while True:
+            try:
+                entry = pickle.load(file)
+            except (EOFError, pickle.UnpicklingError):
+                return
+            yield entry, file.tell()
@@ -0,0 +1,187 @@
+"""Sharded JSON Lines export and import of address books, run on all cores.
+
+    python jsonl.py export kontakty.jsonl --shards 8
+    python jsonl.py import kontakty.jsonl
+
+Every line is one record as returned by Record.to_dict. The export splits
+the book by ID range into shard files named kontakty-00000-of-00008.jsonl
+and writes them in parallel processes; the import parses the shards in
+parallel, in chunks of whole lines, and adds the records in ID order.
+Unlike pickle, the files do not depend on the Python version or on the
+classes of this program.
+"""
+import argparse
+import glob
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from multiprocessing import get_all_start_methods, get_context
+
+from AddresBook_Levenshtein import AddressBook, Record
+from journal import Journal
+
+CHUNK_BYTES = 8 << 20  # Bytes of lines parsed by one import task
+WRITE_LINES = 10_000  # Lines joined into one write() call
+
+shard_book = None  # The book being exported, set once in every worker process
+
+
+def set_shard_book(book):
+    """Process pool initializer that hands the exported book to a worker."""
+    global shard_book
+    shard_book = book
+
+
+def pool(workers, initializer=None, initargs=()):
+    """Returns a process pool that forks where possible, so workers share the parent's memory."""
+    context = get_context("fork") if "fork" in get_all_start_methods() else None
+    return ProcessPoolExecutor(workers, mp_context=context, initializer=initializer, initargs=initargs)
+
+
+def shard_paths(path, shards):
+    """Returns the file names of all shards of path."""
+    base, extension = os.path.splitext(path)
+    return [f"{base}-{shard:05d}-of-{shards:05d}{extension or '.jsonl'}" for shard in range(shards)]
+
+
+def find_shards(path):
+    """Returns the shard files written for path, or [path] itself when it is a single file."""
+    if os.path.exists(path):
+        return [path]
+    base, extension = os.path.splitext(path)
+    paths = sorted(glob.glob(f"{glob.escape(base)}-[0-9][0-9][0-9][0-9][0-9]-of-[0-9][0-9][0-9][0-9][0-9]"
+                             f"{glob.escape(extension or '.jsonl')}"))
+    if not paths:
+        raise FileNotFoundError(f"Nie znaleziono pliku ani fragmentów: {path}")
+    return paths
+
+
+def write_shard(path, low, high):
+    """Writes the records of the shared book with IDs in [low, high) and returns the count."""
+    book = shard_book
+    record_ids = book.sorted_ids.between(low, high)
+    written = 0
+    encode = json.JSONEncoder(ensure_ascii=False, separators=(",", ":")).encode
+    with open(path, "w", encoding="utf-8", newline="\n") as file:
+        while True:
+            chunk = list(islice(record_ids, WRITE_LINES))
+            if not chunk:
+                return written
+            file.write("".join(encode(book.data[record_id].to_dict()) + "\n" for record_id in chunk))
+            written += len(chunk)
+
+
+def export_jsonl(book, path, shards=None):
+    """Writes the book to shards JSON Lines files, one process per shard, and returns their paths.
+
+    Shards hold consecutive, equally sized ID ranges, so concatenating
+    them in name order gives the whole book in ID order. Workers are
+    forked where the platform allows it and read the book from memory
+    shared with the parent instead of receiving a pickled copy.
+    """
+    shards = shards or os.cpu_count() or 1
+    if shards < 1:
+        raise ValueError("Liczba fragmentów musi być dodatnia")
+    paths = shard_paths(path, shards)
+    count = len(book.data)
+    positions = {count * shard // shards for shard in range(1, shards)}
+    bounds = [0] + [record_id for position, record_id in enumerate(book.sorted_ids) if position in positions]
+    bounds += [max(bounds[-1], book.ids.next_id)] * (shards + 1 - len(bounds))
+    with pool(shards, set_shard_book, (book,)) as executor:
+        list(executor.map(write_shard, paths, bounds[:-1], bounds[1:]))
+    return paths
+
+
+def chunk_ranges(path, chunk_bytes=CHUNK_BYTES):
+    """Splits a file into (start, end) byte ranges of about chunk_bytes that end on line boundaries."""
+    ranges = []
+    with open(path, "rb") as file:
+        size = os.fstat(file.fileno()).st_size
+        start = 0
+        while start < size:
+            file.seek(min(start + chunk_bytes, size))
+            file.readline()
+            end = min(file.tell(), size)
+            ranges.append((start, end))
+            start = end
+    return ranges
+
+
+def read_chunk(path, start, end):
+    """Parses the lines in one byte range of a JSON Lines file into records."""
+    with open(path, "rb") as file:
+        file.seek(start)
+        data = file.read(end - start)
+    return [Record.from_dict(json.loads(line)) for line in data.splitlines() if line.strip()]
+
+
+def iter_jsonl(paths, workers=None):
+    """Yields lists of records parsed from the files, in file and line order.
+
+    Chunks are parsed by a process pool while earlier ones are being
+    consumed; at most two chunks per worker are in flight, so memory stays
+    bounded however large the files are.
+    """
+    workers = workers or os.cpu_count() or 1
+    tasks = ((path, start, end) for path in paths for start, end in chunk_ranges(path))
+    with pool(workers) as executor:
+        pending = [executor.submit(read_chunk, *task) for task in islice(tasks, 2 * workers)]
+        while pending:
+            records = pending.pop(0).result()
+            pending.extend(executor.submit(read_chunk, *task) for task in islice(tasks, 1))
+            yield records
+
+
+def import_jsonl(book, path, workers=None):
+    """Adds the records of a JSON Lines file, or of all shards written for path, and returns the count.
+
+    path may also be a list of files. Records keep their exported IDs
+    where the book does not use them yet and they fit in 1..book.MAX_ID;
+    the others get new IDs. Books without place_records, such as
+    SQLiteAddressBook, always assign new IDs.
+    """
+    paths = [path] if isinstance(path, (str, os.PathLike)) else list(path)
+    paths = [shard for name in paths for shard in find_shards(name)]
+    added = 0
+    for records in iter_jsonl(paths, workers):
+        if hasattr(book, "place_records"):
+            taken = set()
+            for record in records:
+                if (not isinstance(record.id, int) or not 1 <= record.id <= book.MAX_ID
+                        or record.id in book.data or record.id in taken):
+                    record.id = book.ids.allocate()
+                else:
+                    book.ids.claim(record.id)
+                taken.add(record.id)
+            book.place_records(records)
+        else:
+            book.add_records(records)
+        added += len(records)
+    return added
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("command", choices=("import", "export"))
+    parser.add_argument("path", help="plik .jsonl lub wspólna nazwa jego fragmentów")
+    parser.add_argument("--shards", type=int, help="liczba plików przy eksporcie (domyślnie liczba rdzeni)")
+    parser.add_argument("--workers", type=int, help="liczba procesów przy imporcie (domyślnie liczba rdzeni)")
+    args = parser.parse_args()
+
+    journal = Journal("address_book.pickle", AddressBook)
+    book = journal.load()
+    book.journal = journal
+    try:
+        if args.command == "import":
+            count = import_jsonl(book, args.path, args.workers)
+            print(f"Zaimportowano {count} wpisów.")
+        else:
+            paths = export_jsonl(book, args.path, args.shards)
+            print(f"Wyeksportowano {len(book)} wpisów do {len(paths)} plików.")
+    finally:
+        journal.close()
+
+
+if __name__ == "__main__":
+    main()
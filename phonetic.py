@@ -0,0 +1,39 @@
+"""Polish-aware phonetic keys for names."""
+import re
+from functools import lru_cache
+
+FOREIGN = str.maketrans({"v": "w", "q": "k", "x": "ks"})
+SOFT = {"c": "ć", "s": "ś", "z": "ź", "n": "ń", "dz": "dź"}
+FINAL_DEVOICING = {"b": "p", "d": "t", "g": "k", "w": "f", "z": "s", "ż": "sz", "ź": "ś", "dz": "c", "dź": "ć", "dż": "cz"}
+PLAIN = str.maketrans("ąęćłńśźż", "oeclnszz")
+SOFT_BEFORE_VOWEL = re.compile(r"(dz|[cszn])i(?=[aeouyąę])")
+SOFT_BEFORE_CONSONANT = re.compile(r"(dz|[cszn])i")
+RZ_AFTER_VOICELESS = re.compile(r"(?<=[ptkfh])rz")
+W_AFTER_VOICELESS = re.compile(r"(?<=[ptkfsh])w")
+NASAL_BEFORE_STOP = re.compile(r"([oeąę])[mn](?=[bpdtkg])")
+VOICED_ENDING = re.compile(r"(d[zżź]|[cs]z|[bdgwzżź])$")
+DOUBLED = re.compile(r"(.)\1+")
+
+
+def phonetic_key(text):
+    """Returns a key shared by Polish names that sound alike.
+
+    "Rzak", "Żak" and "Zak" share a key, as do "Chmiel" and "Hmiel",
+    "Kraków" and "Krakuf", or "Dąbrowski" and "Dombrowski". Spellings
+    without Polish letters fall together with the proper ones, so the key
+    is meant for fetching candidates, which are then ranked by edit distance.
+    """
+    return " ".join(map(word_key, re.findall(r"\w+", text.casefold())))
+
+
+@lru_cache(maxsize=65536)
+def word_key(word):
+    """Returns the phonetic key of one casefolded word; first and last names repeat, so keys are cached."""
+    word = word.translate(FOREIGN).replace("ch", "h").replace("ó", "u")
+    word = RZ_AFTER_VOICELESS.sub("sz", word).replace("rz", "ż")  # "przy" brzmi jak "pszy"
+    word = W_AFTER_VOICELESS.sub("f", word)
+    word = SOFT_BEFORE_VOWEL.sub(lambda match: SOFT[match.group(1)], word)
+    word = SOFT_BEFORE_CONSONANT.sub(lambda match: SOFT[match.group(1)] + "i", word)
+    word = NASAL_BEFORE_STOP.sub(r"\1", word)
+    word = VOICED_ENDING.sub(lambda match: FINAL_DEVOICING.get(match.group(1), match.group(1)), word)
+    return DOUBLED.sub(r"\1", word.translate(PLAIN))
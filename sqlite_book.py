@@ -0,0 +1,533 @@
+"""SQLite storage engine with the same public API as AddressBook."""
+import calendar
+import re
+import sqlite3
+from datetime import date, timedelta
+
+from AddresBook_Levenshtein import (
+    AddressBook, Address, Birthday, Email, Name, Note, Phone, Record, RecordCursor, Tag,
+    levenshtein_distance, next_birthday, postal_code_range, search_key,
+)
+from fulltext import bm25, parse_query, tokenize
+from phonetic import phonetic_key
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL);
+CREATE TABLE IF NOT EXISTS free_ids (id INTEGER PRIMARY KEY);
+CREATE TABLE IF NOT EXISTS records (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    name_lower TEXT NOT NULL,  -- Search key of the name, see search_key
+    birthday TEXT
+);
+CREATE INDEX IF NOT EXISTS records_name ON records (name);
+CREATE INDEX IF NOT EXISTS records_birthday ON records (substr(birthday, 6));
+CREATE TABLE IF NOT EXISTS name_sounds (
+    record_id INTEGER PRIMARY KEY REFERENCES records (id) ON DELETE CASCADE,
+    sound TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS name_sounds_sound ON name_sounds (sound);
+CREATE TABLE IF NOT EXISTS phones (
+    record_id INTEGER NOT NULL REFERENCES records (id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    value TEXT NOT NULL,
+    PRIMARY KEY (record_id, position)
+);
+CREATE INDEX IF NOT EXISTS phones_value ON phones (value);
+CREATE TABLE IF NOT EXISTS emails (
+    record_id INTEGER NOT NULL REFERENCES records (id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    value TEXT NOT NULL,
+    PRIMARY KEY (record_id, position)
+);
+CREATE INDEX IF NOT EXISTS emails_value ON emails (value);
+CREATE INDEX IF NOT EXISTS emails_value_lower ON emails (lower(value));
+CREATE TABLE IF NOT EXISTS tags (
+    record_id INTEGER NOT NULL REFERENCES records (id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    PRIMARY KEY (record_id, position)
+);
+CREATE INDEX IF NOT EXISTS tags_name ON tags (name);
+CREATE TABLE IF NOT EXISTS addresses (
+    record_id INTEGER PRIMARY KEY REFERENCES records (id) ON DELETE CASCADE,
+    street TEXT NOT NULL,
+    city TEXT NOT NULL,
+    postal_code TEXT NOT NULL,
+    country TEXT NOT NULL,
+    city_key TEXT NOT NULL,  -- Search keys of city and country, see search_key
+    country_key TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS addresses_postal_code ON addresses (postal_code);
+CREATE TABLE IF NOT EXISTS notes (
+    record_id INTEGER NOT NULL REFERENCES records (id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    value TEXT NOT NULL,
+    term_count INTEGER NOT NULL DEFAULT 0,  -- Number of fulltext.tokenize terms, for BM25 lengths
+    PRIMARY KEY (record_id, position)
+);
+CREATE TRIGGER IF NOT EXISTS notes_fts_insert_terms AFTER INSERT ON notes BEGIN
+    INSERT INTO notes_fts (rowid, value) VALUES (new.rowid, note_terms(new.value));
+END;
+CREATE TRIGGER IF NOT EXISTS notes_fts_delete_terms AFTER DELETE ON notes BEGIN
+    INSERT INTO notes_fts (notes_fts, rowid, value) VALUES ('delete', old.rowid, note_terms(old.value));
+END;
+CREATE VIRTUAL TABLE IF NOT EXISTS search_fts USING fts5 (
+    name, contacts, tokenize='trigram case_sensitive 1'
+);
+"""
+
+# Notes are indexed as their stemmed terms from fulltext.tokenize, which the
+# tokenizer must keep exactly as they are
+NOTES_FTS = """
+CREATE VIRTUAL TABLE IF NOT EXISTS notes_fts USING fts5 (
+    value, content='notes', content_rowid='rowid', tokenize="unicode61 remove_diacritics 0 tokenchars '_'"
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS notes_vocab USING fts5vocab (notes_fts, instance);
+"""
+
+ADDRESS_KEY_INDEXES = """
+CREATE INDEX IF NOT EXISTS addresses_city_key ON addresses (city_key);
+CREATE INDEX IF NOT EXISTS addresses_country_key ON addresses (country_key);
+"""
+
+CHUNK = 500  # Maximum number of IDs bound in one IN (...) clause
+
+
+class SQLiteAddressBook:
+    """Address book kept in a local SQLite file instead of a pickled dict.
+
+    Records are loaded on demand, so nothing has to be read at startup.
+    Substring search runs on an FTS5 trigram index over lowercased names,
+    phones and emails, and notes get their own FTS5 index of stemmed
+    terms, ranked per record like AddressBook.find_notes.
+    """
+    def __init__(self, path="address_book.db"):
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA foreign_keys = ON")
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.create_function("phonetic_key", 1, phonetic_key, deterministic=True)
+        self.conn.create_function("search_key", 1, search_key, deterministic=True)
+        self.conn.create_function("note_terms", 1, note_terms, deterministic=True)
+        self.conn.create_function("note_term_count", 1, lambda text: len(tokenize(text)), deterministic=True)
+        with self.conn:
+            self.conn.executescript(SCHEMA)
+            self.conn.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('next_id', 1)")
+            # Bazy zapisane przed dodaniem klucza fonetycznego uzupełniamy jednorazowo
+            self.conn.execute(
+                "INSERT INTO name_sounds (record_id, sound) SELECT id, phonetic_key(name) FROM records "
+                "WHERE id NOT IN (SELECT record_id FROM name_sounds)")
+            if self.conn.execute("SELECT 1 FROM meta WHERE key = 'search_keys'").fetchone() is None:
+                # Starsze bazy przechowują imiona tylko po lower() - przeliczamy je na klucze wyszukiwania
+                self.conn.execute("UPDATE records SET name_lower = search_key(name)")
+                self.conn.execute(
+                    "UPDATE search_fts SET name = (SELECT name_lower FROM records WHERE id = search_fts.rowid)")
+                self.conn.execute("INSERT INTO meta (key, value) VALUES ('search_keys', 1)")
+            if "city_key" not in {row[1] for row in self.conn.execute("PRAGMA table_info(addresses)")}:
+                self.conn.execute("ALTER TABLE addresses ADD COLUMN city_key TEXT NOT NULL DEFAULT ''")
+                self.conn.execute("ALTER TABLE addresses ADD COLUMN country_key TEXT NOT NULL DEFAULT ''")
+                self.conn.execute("UPDATE addresses SET city_key = search_key(city), country_key = search_key(country)")
+            self.conn.executescript(ADDRESS_KEY_INDEXES)
+            if self.conn.execute("SELECT 1 FROM meta WHERE key = 'notes_terms'").fetchone() is None:
+                # Starsze bazy indeksowały całe słowa notatek - przebudowujemy indeks na rdzeniach
+                for trigger in ("notes_fts_insert", "notes_fts_delete", "notes_fts_insert_key", "notes_fts_delete_key"):
+                    self.conn.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+                self.conn.execute("DROP TABLE IF EXISTS notes_vocab")
+                self.conn.execute("DROP TABLE IF EXISTS notes_fts")
+                if "term_count" not in {row[1] for row in self.conn.execute("PRAGMA table_info(notes)")}:
+                    self.conn.execute("ALTER TABLE notes ADD COLUMN term_count INTEGER NOT NULL DEFAULT 0")
+                self.conn.executescript(NOTES_FTS)
+                self.conn.execute("UPDATE notes SET term_count = note_term_count(value)")
+                self.conn.execute("INSERT INTO notes_fts (rowid, value) SELECT rowid, note_terms(value) FROM notes")
+                self.conn.execute("INSERT INTO meta (key, value) VALUES ('notes_terms', 1)")
+
+    def close(self):
+        self.conn.close()
+
+    def allocate_id(self):
+        """Returns the smallest freed ID, or the next fresh one."""
+        row = self.conn.execute("SELECT MIN(id) FROM free_ids").fetchone()
+        if row[0] is not None:
+            self.conn.execute("DELETE FROM free_ids WHERE id = ?", row)
+            return row[0]
+        record_id = self.conn.execute("SELECT value FROM meta WHERE key = 'next_id'").fetchone()[0]
+        self.conn.execute("UPDATE meta SET value = value + 1 WHERE key = 'next_id'")
+        return record_id
+
+    def add_record(self, record: Record):
+        """Adds an entry to the address book with ID management."""
+        with self.conn:
+            record.id = self.allocate_id()
+            self.write_record(record)
+        record.book = self
+
+    def add_records(self, records):
+        """Adds many entries in a single transaction."""
+        with self.conn:
+            for record in records:
+                record.id = self.allocate_id()
+                self.write_record(record)
+                record.book = self
+
+    def write_record(self, record):
+        """Inserts all rows of the record; the caller owns the transaction."""
+        record_id = record.id
+        self.conn.execute(
+            "INSERT INTO records (id, name, name_lower, birthday) VALUES (?, ?, ?, ?)",
+            (record_id, record.name.value, record.name.key,
+             record.birthday.value if record.birthday else None),
+        )
+        self.conn.execute("INSERT INTO name_sounds (record_id, sound) VALUES (?, ?)", (record_id, record.name.sound))
+        self.conn.executemany(
+            "INSERT INTO phones (record_id, position, value) VALUES (?, ?, ?)",
+            [(record_id, position, phone.value) for position, phone in enumerate(record.phones)],
+        )
+        self.conn.executemany(
+            "INSERT INTO emails (record_id, position, value) VALUES (?, ?, ?)",
+            [(record_id, position, email.value) for position, email in enumerate(record.emails)],
+        )
+        self.conn.executemany(
+            "INSERT INTO tags (record_id, position, name) VALUES (?, ?, ?)",
+            [(record_id, position, tag.name) for position, tag in enumerate(record.tags)],
+        )
+        self.conn.executemany(
+            "INSERT INTO notes (record_id, position, value, term_count) VALUES (?, ?, ?, ?)",
+            [(record_id, position, note.value, len(tokenize(note.value)))
+             for position, note in enumerate(record.notes)],
+        )
+        if record.address:
+            address = record.address
+            self.conn.execute(
+                "INSERT INTO addresses (record_id, street, city, postal_code, country, city_key, country_key) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (record_id, address.street, address.city, address.postal_code, address.country,
+                 search_key(address.city), search_key(address.country)),
+            )
+        contacts = "\n".join([phone.value for phone in record.phones] + [email.value for email in record.emails])
+        self.conn.execute(
+            "INSERT INTO search_fts (rowid, name, contacts) VALUES (?, ?, ?)",
+            (record_id, record.name.key, contacts),
+        )
+
+    def delete_rows(self, record_id):
+        """Deletes all rows of the record; the caller owns the transaction."""
+        self.conn.execute("DELETE FROM notes WHERE record_id = ?", (record_id,))
+        self.conn.execute("DELETE FROM search_fts WHERE rowid = ?", (record_id,))
+        self.conn.execute("DELETE FROM records WHERE id = ?", (record_id,))
+
+    def remove_record(self, record_id):
+        """Removes the entry with the given ID and frees the ID for reuse."""
+        record = self[record_id]
+        with self.conn:
+            self.delete_rows(record_id)
+            self.conn.execute("INSERT INTO free_ids (id) VALUES (?)", (record_id,))
+        record.book = None
+        return record
+
+    def record_changed(self, record):
+        """Writes the current state of an edited record."""
+        with self.conn:
+            self.delete_rows(record.id)
+            self.write_record(record)
+
+    def field_added(self, record, kind, field):
+        self.record_changed(record)
+
+    def field_removed(self, record, kind, field):
+        self.record_changed(record)
+
+    def load_records(self, record_ids):
+        """Returns records for the given IDs, in the same order, skipping missing ones."""
+        records = {}
+        record_ids = list(record_ids)
+        for start in range(0, len(record_ids), CHUNK):
+            chunk = record_ids[start:start + CHUNK]
+            marks = ", ".join("?" * len(chunk))
+            for record_id, name, birthday in self.conn.execute(
+                    f"SELECT id, name, birthday FROM records WHERE id IN ({marks})", chunk):
+                record = Record(Name(name), Birthday(birthday) if birthday else None)
+                record.id = record_id
+                records[record_id] = record
+            for table, column, field, attribute in (
+                    ("phones", "value", Phone, "phones"),
+                    ("emails", "value", Email, "emails"),
+                    ("tags", "name", Tag, "tags"),
+                    ("notes", "value", Note, "notes")):
+                for record_id, value in self.conn.execute(
+                        f"SELECT record_id, {column} FROM {table} WHERE record_id IN ({marks}) "
+                        f"ORDER BY record_id, position", chunk):
+                    record = records[record_id]
+                    setattr(record, attribute, getattr(record, attribute) + (field(value),))
+            for record_id, street, city, postal_code, country in self.conn.execute(
+                    f"SELECT record_id, street, city, postal_code, country FROM addresses "
+                    f"WHERE record_id IN ({marks})", chunk):
+                records[record_id].address = Address(street, city, postal_code, country)
+        for record in records.values():
+            record.book = self
+        return [records[record_id] for record_id in record_ids if record_id in records]
+
+    def find_record(self, search_term):
+        """Finds entries containing the exact phrase provided.
+
+        A complete phone number or email address is looked up exactly in the
+        column indexes instead of being searched for as a fragment. Digits
+        with a star, like "601*", "*4521" or "*452*", search phone numbers by
+        prefix, suffix or infix.
+        """
+        phone = Phone.normalize(search_term)
+        if phone is not None:
+            rows = self.conn.execute("SELECT DISTINCT record_id FROM phones WHERE value = ?", (phone,))
+            return self.load_records(sorted(row[0] for row in rows))
+        if Email.validate_email(search_term.strip()):
+            rows = self.conn.execute("SELECT DISTINCT record_id FROM emails WHERE lower(value) = ?",
+                                     (search_term.strip().lower(),))
+            return self.load_records(sorted(row[0] for row in rows))
+        wildcard = re.match(r"^(\*?)(\d+)(\*?)$", search_term.strip())
+        if wildcard and (wildcard.group(1) or wildcard.group(3)):
+            mode = {("", "*"): "prefix", ("*", ""): "suffix", ("*", "*"): "infix"}[wildcard.group(1, 3)]
+            return self.find_by_phone(wildcard.group(2), mode)
+        key = search_key(search_term)
+        if "-" in search_term and postal_code_range(search_term) is not None:
+            return self.find_by_address(postal_code=search_term)
+        if len(search_term) < 3:
+            # Fraza krótsza niż trigram - indeks FTS nie pomoże
+            rows = self.conn.execute(
+                "SELECT id FROM records WHERE instr(name_lower, ?) > 0 "
+                "UNION SELECT record_id FROM phones WHERE instr(value, ?) > 0 "
+                "UNION SELECT record_id FROM emails WHERE instr(value, ?) > 0",
+                (key, search_term, search_term),
+            )
+        else:
+            query = f'name : {fts_phrase(key)} OR contacts : {fts_phrase(search_term)}'
+            rows = self.conn.execute("SELECT rowid FROM search_fts WHERE search_fts MATCH ?", (query,))
+        found_records = {record.id: record for record in self.load_records(row[0] for row in rows)
+                         if AddressBook.record_matches(record, search_term, key)}
+        rows = list(self.conn.execute("SELECT record_id FROM addresses WHERE city_key = ?", (key.strip(),)))
+        phrase = tokenize(search_term)
+        if phrase:
+            rows += ((record_id,) for record_id in self.phrase_ids(phrase))
+        for record in self.load_records({row[0] for row in rows if row[0] not in found_records}):
+            found_records[record.id] = record
+        return [found_records[record_id] for record_id in sorted(found_records)]
+
+    def find_by_phone(self, digits, mode="infix"):
+        """Finds entries whose phone number starts with, ends with or contains the digits.
+
+        The mode is "prefix", "suffix" or "infix". Prefixes are a range scan
+        of the phones index; suffixes and infixes of three or more digits
+        are narrowed down with the trigram index first.
+        """
+        if mode not in ("prefix", "suffix", "infix"):
+            raise ValueError(f"Nieznany tryb wyszukiwania: {mode}")
+        if not (digits.isascii() and digits.isdigit()):
+            return []
+        if mode == "prefix":
+            # ":" sortuje się tuż za "9", więc zamyka zakres numerów zaczynających się od digits
+            rows = self.conn.execute(
+                "SELECT DISTINCT record_id FROM phones WHERE value >= ? AND value < ?", (digits, digits + ":"))
+        else:
+            condition, params = (("substr(value, -?) = ?", [len(digits), digits]) if mode == "suffix"
+                                 else ("instr(value, ?) > 0", [digits]))
+            if len(digits) >= 3:
+                rows = self.conn.execute(
+                    "SELECT DISTINCT record_id FROM search_fts JOIN phones ON phones.record_id = search_fts.rowid "
+                    f"WHERE search_fts MATCH ? AND {condition}", [f"contacts : {fts_phrase(digits)}"] + params)
+            else:
+                rows = self.conn.execute(f"SELECT DISTINCT record_id FROM phones WHERE {condition}", params)
+        return self.load_records(sorted(row[0] for row in rows))
+
+    def find_records_by_name(self, name):
+        """Finds records that match the given name and surname."""
+        key = search_key(name)
+        if len(key) < 3:
+            rows = self.conn.execute("SELECT id FROM records WHERE instr(name_lower, ?) > 0", (key,))
+        else:
+            rows = self.conn.execute(
+                "SELECT rowid FROM search_fts WHERE search_fts MATCH ?", (f"name : {fts_phrase(key)}",))
+        records = self.load_records(sorted(row[0] for row in rows))
+        return [(record.id, record) for record in records if key in record.name.key]
+
+    def find_notes(self, query, k=None):
+        """Returns up to k records whose notes match the query, best BM25 score first.
+
+        The query is read and ranked like AddressBook.find_notes: loose
+        words match any of them, every "quoted phrase" must appear in one
+        note, and the notes of a record are scored together as one document.
+        Words are matched as whole stemmed terms.
+        """
+        terms, phrases = parse_query(query)
+        if phrases:
+            candidates = None
+            for phrase in phrases:
+                matching = self.phrase_ids(phrase)
+                candidates = matching if candidates is None else candidates & matching
+            terms += [term for phrase in phrases for term in phrase]
+        postings = {term: self.term_postings(term) for term in sorted(set(terms))}
+        if not phrases:
+            candidates = {record_id for docs in postings.values() for record_id in docs}
+        if not candidates:
+            return []
+        count, total_length = self.conn.execute(
+            "SELECT COUNT(*), SUM(length) FROM (SELECT SUM(term_count) AS length FROM notes "
+            "GROUP BY record_id HAVING length > 0)").fetchone()
+        lengths = {}
+        candidate_ids = sorted(candidates)
+        for start in range(0, len(candidate_ids), CHUNK):
+            chunk = candidate_ids[start:start + CHUNK]
+            lengths.update(self.conn.execute(
+                f"SELECT record_id, SUM(term_count) FROM notes WHERE record_id IN ({', '.join('?' * len(chunk))}) "
+                "GROUP BY record_id", chunk))
+        hits = bm25(candidates, postings, lengths, count, total_length, k)
+        return self.load_records(record_id for record_id, score in hits)
+
+    def phrase_ids(self, phrase):
+        """Returns IDs of records with a note containing the stemmed terms one after another."""
+        rows = self.conn.execute(
+            "SELECT DISTINCT notes.record_id FROM notes_fts JOIN notes ON notes.rowid = notes_fts.rowid "
+            "WHERE notes_fts MATCH ?", (fts_phrase(" ".join(phrase)),))
+        return {row[0] for row in rows}
+
+    def term_postings(self, term):
+        """Returns {record ID: occurrences} of one stemmed term across the notes of each record."""
+        return dict(self.conn.execute(
+            "SELECT notes.record_id, COUNT(*) FROM notes_vocab JOIN notes ON notes.rowid = notes_vocab.doc "
+            "WHERE notes_vocab.term = ? GROUP BY notes.record_id", (term,)))
+
+    def shared_tag(self, tag):
+        """Returns the tag itself; records loaded from the database do not share tags."""
+        return tag
+
+    def rename_tag(self, old_name, new_name):
+        """Renames a tag on every record at once."""
+        with self.conn:
+            self.conn.execute("UPDATE tags SET name = ? WHERE name = ?", (new_name, old_name))
+
+    def find_by_address(self, city=None, postal_code=None, country=None):
+        """Returns records whose address matches every given component, by ID."""
+        conditions, params = [], []
+        if city is not None:
+            conditions.append("city_key = ?")
+            params.append(search_key(city))
+        if country is not None:
+            conditions.append("country_key = ?")
+            params.append(search_key(country))
+        if postal_code is not None:
+            bounds = postal_code_range(postal_code)
+            if bounds is None:
+                raise ValueError(f"Niepoprawny kod pocztowy: {postal_code}")
+            # Kody XX-XXX porównane jako tekst zachowują kolejność liczbową
+            conditions.append("postal_code GLOB '[0-9][0-9]-[0-9][0-9][0-9]' AND postal_code >= ? AND postal_code < ?")
+            low, high = bounds
+            # ":" sortuje się za cyframi, więc zamyka zakres kończący się na 99-999
+            params += [f"{low // 1000:02d}-{low % 1000:03d}", f"{high // 1000:02d}-{high % 1000:03d}" if high < 100_000 else ":"]
+        if not conditions:
+            raise ValueError("Podaj miasto, kod pocztowy lub kraj")
+        rows = self.conn.execute(
+            f"SELECT record_id FROM addresses WHERE {' AND '.join(conditions)} ORDER BY record_id", params)
+        return self.load_records([row[0] for row in rows])
+
+    def find_by_tags(self, all_of=(), any_of=(), none_of=()):
+        """Returns records having all tags of all_of, at least one of any_of and none of none_of, by ID."""
+        selects = ["SELECT DISTINCT record_id FROM tags WHERE name = ?"] * len(all_of)
+        params = list(all_of)
+        if any_of:
+            selects.append(f"SELECT DISTINCT record_id FROM tags WHERE name IN ({', '.join('?' * len(any_of))})")
+            params += any_of
+        query = " INTERSECT ".join(selects or ["SELECT id FROM records"])
+        if none_of:
+            query += f" EXCEPT SELECT record_id FROM tags WHERE name IN ({', '.join('?' * len(none_of))})"
+            params += none_of
+        rows = self.conn.execute(query + " ORDER BY 1", params)
+        return self.load_records([row[0] for row in rows])
+
+    def correct_name(self, text):
+        """Returns the closest stored name within two edits of text, or None."""
+        hits = self.fuzzy_names(text, 2, 1)
+        return hits[0][0] if hits and hits[0][1] > 0 else None
+
+    def upcoming_birthdays(self, days=7, today=None):
+        """Returns records with a birthday within the next days, soonest first."""
+        today = today or date.today()
+        end_day = today + timedelta(days=days)
+        first, last = today.strftime("%m-%d"), end_day.strftime("%m-%d")
+        if last == "02-28" and not calendar.isleap(end_day.year):
+            last = "02-29"
+        if days >= 365:
+            condition, params = "birthday IS NOT NULL", ()
+        elif end_day.year == today.year:
+            condition, params = "substr(birthday, 6) BETWEEN ? AND ?", (first, last)
+        else:
+            condition, params = "(substr(birthday, 6) >= ? OR substr(birthday, 6) <= ?)", (first, last)
+        rows = self.conn.execute(f"SELECT id FROM records WHERE {condition}", params)
+        records = self.load_records([row[0] for row in rows])
+        records.sort(key=lambda record: (next_birthday(record.birthday.date, today), record.id))
+        return records
+
+    def sounds_like(self, query, k=None):
+        """Returns up to k (name, distance) pairs for names that sound like the query, closest first."""
+        rows = self.conn.execute(
+            "SELECT DISTINCT name FROM records JOIN name_sounds ON name_sounds.record_id = records.id "
+            "WHERE sound = ?", (phonetic_key(query),))
+        hits = sorted(((name, levenshtein_distance(query, name)) for (name,) in rows), key=lambda hit: (hit[1], hit[0]))
+        return hits[:k] if k is not None else hits
+
+    def fuzzy_names(self, query, max_distance=2, k=None):
+        """Returns up to k (name, distance) pairs within max_distance edits of the query."""
+        rows = self.conn.execute(
+            "SELECT DISTINCT name FROM records WHERE length(name) BETWEEN ? AND ?",
+            (len(query) - max_distance, len(query) + max_distance),
+        )
+        hits = []
+        for (name,) in rows:
+            distance = levenshtein_distance(query, name)
+            if distance <= max_distance:
+                hits.append((name, distance))
+        hits.sort(key=lambda hit: (hit[1], hit[0]))
+        return hits[:k] if k is not None else hits
+
+    def show_all_records(self):
+        """Displays all entries in the address book."""
+        if not len(self):
+            print("Książka adresowa jest pusta.")
+            return
+        for page in self.cursor(page_size=100):
+            for record in page:
+                print(record)
+
+    def page_after(self, last_id, page_size):
+        """Returns up to page_size records with IDs greater than last_id, in ID order."""
+        rows = self.conn.execute("SELECT id FROM records WHERE id > ? ORDER BY id LIMIT ?", (last_id, page_size))
+        return self.load_records([row[0] for row in rows])
+
+    def cursor(self, page_size=5, token=None):
+        """Returns a new cursor over the records, optionally resuming from a token."""
+        return RecordCursor(self, page_size, token)
+
+    def __iter__(self):
+        """Returns an iterator over the address book records, five per page."""
+        return self.cursor()
+
+    def __len__(self):
+        return self.conn.execute("SELECT COUNT(*) FROM records").fetchone()[0]
+
+    def __contains__(self, record_id):
+        return self.conn.execute("SELECT 1 FROM records WHERE id = ?", (record_id,)).fetchone() is not None
+
+    def __getitem__(self, record_id):
+        records = self.load_records([record_id])
+        if not records:
+            raise KeyError(record_id)
+        return records[0]
+
+    delete_record_by_id = AddressBook.delete_record_by_id
+    delete_record = AddressBook.delete_record
+
+
+def fts_phrase(text):
+    """Quotes text as a single FTS5 phrase."""
+    return '"' + text.replace('"', '""') + '"'
+
+
+def note_terms(text):
+    """Returns the stemmed terms of a note joined by spaces, as stored in notes_fts."""
+    return " ".join(tokenize(text))
@@ -0,0 +1,43 @@
+import os
+import random
+import sys
+
+import pytest
+
+# Moduły książki leżą płasko w katalogu głównym repozytorium, generator w benchmarks/
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [ROOT, os.path.join(ROOT, "benchmarks")]
+
+from AddresBook_Levenshtein import AddressBook, Name, Note, Phone, Tag  # noqa: E402
+from generator import generate_records  # noqa: E402
+
+
+def churned_book(count=1500, seed=7):
+    """Returns a generated book after random deletes, re-adds and edits, so every index was updated in place."""
+    rnd = random.Random(seed)
+    book = AddressBook()
+    book.add_records(generate_records(count, seed))
+    for record_id in rnd.sample(sorted(book.data), count // 10):
+        book.remove_record(record_id)
+    for record in generate_records(count // 20, seed + 1):
+        book.add_record(record)
+    for record in rnd.sample(list(book.data.values()), count // 10):
+        action = rnd.randrange(5)
+        if action == 0:
+            record.edit_name(Name(record.name.value.split()[0] + " Nowakowska"))
+        elif action == 1 and record.phones:
+            record.edit_phone(record.phones[0], Phone(f"60{rnd.randrange(10_000_000):07d}"))
+        elif action == 2 and record.tags:
+            record.remove_tag(record.tags[0])
+        elif action == 3:
+            record.add_tag(Tag("vip"))
+        elif record.notes:
+            record.edit_note(record.notes[0], Note("Faktura zapłacona, złożył reklamację"))
+        else:
+            record.add_note(Note("Oddzwonić po świętach"))
+    return book
+
+
+@pytest.fixture(scope="module")
+def book():
+    return churned_book()
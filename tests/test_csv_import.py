@@ -0,0 +1,98 @@
+"""import_csv compared with validating and building every row on its own."""
+import csv
+import random
+
+import pytest
+
+from AddresBook_Levenshtein import AddressBook, Birthday, Email, Phone, postal_code_number, search_key
+from csv_import import COLUMNS, import_csv
+
+CELLS = {
+    "name": ["Jan Kowalski", "Anna Nowak", "Łukasz Wójcik", "", "  "],
+    "phones": ["601234567", "+48 601 234 567", "601234567;512345678", "60123", "601234567;abc", ""],
+    "emails": ["jan@wp.pl", "anna.nowak@gmail.com;a@b.pl", "jan@wp", "", "x@y.pl;zły adres"],
+    "birthday": ["1990-02-28", "1992-02-29", "1990-02-30", "1990-13-01", "", "1985-7-4"],
+    "street": ["Długa 1", "", "Polna 5/3"],
+    "city": ["Łódź", "Kraków", ""],
+    "postal_code": ["90-001", "31-xxx", "", "12345"],
+    "country": ["Polska", "Niemcy", "PL", ""],
+    "tags": ["klient", "vip;praca", ""],
+    "notes": ["Oddzwonić w sprawie faktury", "a;b", ""],
+}
+
+
+def reference_error(row):
+    """Returns the reason build_batch should give for the row, or None, checking the fields one by one."""
+    for value in filter(None, map(str.strip, row["phones"].split(";"))):
+        value = Phone.normalize(value) or value
+        try:
+            Phone(value)
+        except ValueError:
+            return f"Niepoprawny numer telefonu: {value}"
+    for value in filter(None, map(str.strip, row["emails"].split(";"))):
+        try:
+            Email(value)
+        except ValueError:
+            return f"Niepoprawny adres email: {value}"
+    if row["birthday"].strip():
+        try:
+            Birthday(row["birthday"].strip())
+        except ValueError:
+            return f"Niepoprawna data urodzenia: {row['birthday'].strip()}"
+    if not row["name"].strip():
+        return "Brak imienia i nazwiska"
+    street, city, postal_code, country = (row[column] for column in ("street", "city", "postal_code", "country"))
+    if (street or city or postal_code or country) and not (street and city):
+        return "Niepełny adres: brak ulicy lub miasta"
+    if postal_code and search_key(country) in {"polska", "poland", "pl"} and postal_code_number(postal_code) is None:
+        return f"Niepoprawny kod pocztowy: {postal_code}"
+    return None
+
+
+def random_rows(count, seed):
+    rnd = random.Random(seed)
+    return [{column: rnd.choice(CELLS[column]) for column in COLUMNS} for _ in range(count)]
+
+
+def write_csv(path, rows):
+    with open(path, "w", newline="", encoding="utf-8") as file:
+        writer = csv.DictWriter(file, COLUMNS)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+@pytest.mark.parametrize("batch_size", [1, 7, 1000])
+def test_import_csv_matches_row_by_row_validation(tmp_path, batch_size):
+    rows = random_rows(400, seed=batch_size)
+    path, rejected_path = tmp_path / "kontakty.csv", tmp_path / "odrzucone.csv"
+    write_csv(path, rows)
+    book = AddressBook()
+    reports = []
+    report = import_csv(book, path, batch_size, rejected_path, progress=lambda report: reports.append(report.rows))
+
+    errors = [reference_error(row) for row in rows]
+    valid = [row for row, error in zip(rows, errors) if error is None]
+    assert (report.rows, report.imported, report.rejected) == (len(rows), len(valid), len(rows) - len(valid))
+    assert reports == [min(end, len(rows)) for end in range(batch_size, len(rows) + batch_size, batch_size)]
+    with open(rejected_path, newline="", encoding="utf-8") as file:
+        assert list(csv.DictReader(file)) == [{**row, "error": error} for row, error in zip(rows, errors) if error]
+
+    assert sorted(book.data) == list(range(1, len(valid) + 1))
+    for record_id, row in zip(sorted(book.data), valid):
+        record = book.data[record_id]
+        assert record.name.value == row["name"].strip()
+        assert [phone.value for phone in record.phones] == [
+            Phone.normalize(phone) for phone in filter(None, map(str.strip, row["phones"].split(";")))]
+        assert [email.value for email in record.emails] == list(filter(None, row["emails"].split(";")))
+        assert (record.birthday.date.isoformat() if record.birthday else "") == (
+            Birthday(row["birthday"]).date.isoformat() if row["birthday"] else "")
+        assert (record.address.city if record.address else "") == (row["city"] if row["street"] else "")
+        assert [tag.name for tag in record.tags] == list(filter(None, row["tags"].split(";")))
+        assert [note.value for note in record.notes] == list(filter(None, row["notes"].split(";")))
+
+
+def test_import_csv_needs_a_name_column(tmp_path):
+    path = tmp_path / "kontakty.csv"
+    path.write_text("phones,emails\n601234567,jan@wp.pl\n", encoding="utf-8")
+    with pytest.raises(ValueError):
+        import_csv(AddressBook(), path)
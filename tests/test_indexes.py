@@ -0,0 +1,329 @@
+"""Every indexed query of AddressBook compared with a brute-force scan of the same book."""
+import random
+from datetime import date
+
+import pytest
+
+from AddresBook_Levenshtein import (
+    AddressBook, Birthday, Name, Note, Record, Tag, edit_record, next_birthday, search_key,
+)
+from fulltext import parse_query, tokenize
+from id_allocator import IdAllocator
+from phonetic import phonetic_key
+
+
+def edit_distance(a, b):
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, start=1):
+        current = [i]
+        for j, char_b in enumerate(b, start=1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b)))
+        previous = current
+    return previous[-1]
+
+
+def ids(records):
+    return [record.id for record in records]
+
+
+def scan(book, predicate):
+    return sorted(record_id for record_id, record in book.data.items() if predicate(record))
+
+
+def contains_phrase(record, phrase):
+    if not phrase:
+        return False
+    for note in record.notes:
+        terms = tokenize(note.value)
+        if any(terms[start:start + len(phrase)] == phrase for start in range(len(terms))):
+            return True
+    return False
+
+
+def sample(book, count, seed=1):
+    return random.Random(seed).sample([book.data[record_id] for record_id in sorted(book.data)], count)
+
+
+def test_find_record_matches_scan(book):
+    terms = ["Kowal", "ski", "łuk", "ANNA", "nowakowska", "a", "60", "123", "@wp", "gmail.com", "Łódź", "lodz",
+             "w sprawie", "faktury", "reklamację"]
+    for record in sample(book, 20):
+        terms += [record.name.value.split()[-1][:4], record.phones[0].value[2:6]]
+    for term in terms:
+        key = search_key(term)
+        expected = scan(book, lambda record: key in record.name.key
+                        or any(term in phone.value for phone in record.phones)
+                        or any(term in email.value for email in record.emails)
+                        or (record.address is not None and search_key(record.address.city) == key.strip())
+                        or contains_phrase(record, tokenize(term)))
+        assert ids(book.find_record(term)) == expected, term
+
+
+def test_find_record_exact_phone_and_email(book):
+    for record in sample(book, 30):
+        phone = record.phones[0].value
+        assert ids(book.find_record(phone)) == scan(book, lambda other: any(p.value == phone for p in other.phones))
+        assert record.id in ids(book.find_record(f"+48 {phone[:3]} {phone[3:6]} {phone[6:]}"))
+        if record.emails:
+            email = record.emails[0].value.upper()
+            assert ids(book.find_record(email)) == scan(
+                book, lambda other: any(e.value.lower() == email.lower() for e in other.emails))
+
+
+def test_phone_wildcards_match_scan(book):
+    for record in sample(book, 30):
+        phone = record.phones[0].value
+        for digits in (phone[:1], phone[:3], phone[:8]):
+            assert ids(book.find_record(digits + "*")) == scan(
+                book, lambda other: any(p.value.startswith(digits) for p in other.phones))
+        for digits in (phone[-2:], phone[-4:]):
+            assert ids(book.find_record("*" + digits)) == scan(
+                book, lambda other: any(p.value.endswith(digits) for p in other.phones))
+        for digits in (phone[3:5], phone[2:6], phone):
+            assert ids(book.find_record(f"*{digits}*")) == scan(
+                book, lambda other: any(digits in p.value for p in other.phones))
+
+
+def test_postal_codes_and_addresses_match_scan(book):
+    for pattern, prefix in (("90-xxx", "90-"), ("30-0xx", "30-0"), ("00-*", "00-")):
+        assert ids(book.find_record(pattern)) == scan(book, lambda record: record.address.postal_code.startswith(prefix))
+    for record in sample(book, 10):
+        code = record.address.postal_code
+        assert ids(book.find_by_address(postal_code=code)) == scan(book, lambda other: other.address.postal_code == code)
+    for city in ("lodz", "KRAKÓW", "Zielona Góra"):
+        assert ids(book.find_by_address(city=city)) == scan(
+            book, lambda record: search_key(record.address.city) == search_key(city))
+    assert ids(book.find_by_address(city="Łódź", postal_code="90-xxx", country="polska")) == scan(
+        book, lambda record: record.address.city == "Łódź" and record.address.postal_code.startswith("90-"))
+
+
+def test_find_records_by_name_matches_scan(book):
+    for name in ("kowalsk", "Łukasz", "lukasz nowak", "Anna"):
+        expected = scan(book, lambda record: search_key(name) in record.name.key)
+        assert sorted(record_id for record_id, record in book.find_records_by_name(name)) == expected
+
+
+def test_find_by_tags_matches_scan(book):
+    queries = [((), (), ()), (("klient",), (), ()), (("vip", "praca"), (), ()), ((), ("rodzina", "znajomi"), ()),
+               (("klient",), ("vip", "praca"), ("newsletter",)), ((), (), ("klient", "vip")), (("nieznany",), (), ())]
+    for all_of, any_of, none_of in queries:
+        def matches(record):
+            names = {tag.name for tag in record.tags}
+            return (names.issuperset(all_of) and (not any_of or names & set(any_of))
+                    and not names & set(none_of))
+        assert ids(book.find_by_tags(all_of, any_of, none_of)) == scan(book, matches)
+
+
+def test_find_notes_matches_scan(book):
+    for query in ("faktury", "reklamacja kurier", "oddzwonić", '"w sprawie faktury"', '"kontakt" telefoniczny',
+                  "a-b", "faktur?", '"oddzwonić'):
+        terms, phrases = parse_query(query)
+        if phrases:
+            expected = scan(book, lambda record: all(contains_phrase(record, phrase) for phrase in phrases))
+        else:
+            expected = scan(book, lambda record: any(term in tokenize(note.value)
+                                                     for note in record.notes for term in terms))
+        hits = book.find_notes(query)
+        assert sorted(ids(hits)) == expected, query
+        assert ids(book.find_notes(query, k=5)) == ids(hits)[:5]
+
+
+def test_upcoming_birthdays_match_scan():
+    book = AddressBook()
+    book.add_records(Record(Name(f"Osoba {day}"), Birthday(day)) for day in (
+        "1980-02-28", "1984-02-29", "1990-03-01", "1975-12-31", "2000-01-01", "1999-01-05", "1988-06-15", "1984-02-29"))
+    for today in (date(2023, 2, 27), date(2023, 2, 28), date(2024, 2, 28), date(2024, 2, 29), date(2023, 3, 1),
+                  date(2023, 12, 28), date(2024, 12, 31)):
+        for days in (0, 1, 2, 7, 30, 364, 365):
+            hits = book.upcoming_birthdays(days, today)
+            expected = scan(book, lambda record: (next_birthday(record.birthday.date, today) - today).days <= days)
+            assert sorted(ids(hits)) == expected, (today, days)
+            dates = [next_birthday(record.birthday.date, today) for record in hits]
+            assert dates == sorted(dates), (today, days)
+
+
+def test_upcoming_birthdays_on_generated_book(book):
+    today = date(2023, 12, 20)
+    expected = scan(book, lambda record: record.birthday is not None
+                    and (next_birthday(record.birthday.date, today) - today).days <= 30)
+    assert sorted(ids(book.upcoming_birthdays(30, today))) == expected
+
+
+@pytest.mark.parametrize("k", [None, 1, 5])
+def test_fuzzy_names_match_scan(book, k):
+    names = sorted({record.name.value for record in book.data.values()})
+    for query in ("Jan Kowalsky", "Ana Nowak", "Łukasz Wujcik", "Zbigniew"):
+        for max_distance in (1, 2, 3):
+            expected = sorted((edit_distance(query, name), name) for name in names
+                              if edit_distance(query, name) <= max_distance)
+            expected = [(name, distance) for distance, name in expected][:k]
+            assert book.fuzzy_names(query, max_distance, k) == expected
+
+
+@pytest.mark.parametrize("chunk_rows", [3, 16384])
+def test_name_column_distances_match_scan(monkeypatch, chunk_rows):
+    pytest.importorskip("numpy")
+    from edit_distance import NameColumn
+    monkeypatch.setattr("edit_distance.CHUNK_ROWS", chunk_rows)
+    rnd = random.Random(chunk_rows)
+    names = ["", "a", "Jan Kowalski", "Łukasz Wójcik", "jan kowalsky", "😀 Ewa"] + [
+        "".join(rnd.choice("abcłóż ") for _ in range(rnd.randrange(15))) for _ in range(200)]
+    column = NameColumn(names)
+    for query in ("", "jan", "Jan Kowalski", "łóż", "ab cab", "😀"):
+        expected = [edit_distance(query, name) for name in names]
+        assert list(column.distances(query)) == expected, query
+        for max_distance in (0, 1, 3):
+            assert list(column.distances(query, max_distance)) == [
+                min(distance, max_distance + 1) for distance in expected], (query, max_distance)
+
+
+def test_score_names_matches_scan(book):
+    pytest.importorskip("numpy")
+    for query, max_distance in (("Jan Kowalsky", None), ("Anna Nowak", 2)):
+        record_ids, distances = book.score_names(query, max_distance)
+        assert list(record_ids) == list(book.sorted_ids)
+        assert list(distances) == [
+            min(edit_distance(query, book.data[record_id].name.value), (max_distance or 10 ** 6) + 1)
+            for record_id in record_ids]
+
+
+def test_sounds_like_matches_scan(book):
+    for query in ("Jan Kowalsky", "Agnieska Nowak", "Hrzegorz Wujcik"):
+        names = {record.name.value for record in book.data.values() if record.name.sound == phonetic_key(query)}
+        assert [name for name, distance in book.sounds_like(query)] == sorted(
+            names, key=lambda name: (edit_distance(query, name), name))
+
+
+@pytest.mark.parametrize("fields", [("name",), ("name", "email", "city")])
+def test_fuzzy_search_top_k_matches_scan(book, fields):
+    for query, k, max_distance in (("jan kowalsky", 10, None), ("warszawa", 5, 2), ("anna.nowak", 3, 4),
+                                   ("łukasz", 1, None), ("kowalska", 40, 3), ("kraków", 3, 0)):
+        scored = []
+        for record_id, record in book.data.items():
+            values = [value.lower() for field in fields for value in AddressBook.FUZZY_FIELDS[field](record)]
+            if values:
+                score = min(edit_distance(query, value) for value in values)
+                if max_distance is None or score <= max_distance:
+                    scored.append((score, record_id))
+        expected = sorted(scored)[:k]
+        assert [(record.id, score) for record, score in book.fuzzy_search(query, k, max_distance, fields)] == [
+            (record_id, score) for score, record_id in expected]
+
+
+def test_cursor_walks_every_id_in_order(book):
+    walked = [record.id for page in book.cursor(page_size=7) for record in page]
+    assert walked == sorted(book.data)
+    assert list(book.sorted_ids) == sorted(book.data)
+
+
+def test_dict_access_keeps_indexes_in_step():
+    book = AddressBook()
+    for name in ("Jan Kowalski", "Anna Kowalska", "Jan Nowak"):
+        record = Record(Name(name))
+        record.add_tag(Tag("klient"))
+        book.add_record(record)
+    del book[1]
+    book.pop(3)
+    book[7] = Record(Name("Ewa Kowalska"))
+    assert ids(book.find_record("Kowal")) == [2, 7]
+    assert ids(book.find_by_tags(all_of=["klient"])) == [2]
+    assert sorted(record.id for record, score in book.fuzzy_search("jan", k=5)) == [2, 7]
+    assert list(book.sorted_ids) == [2, 7]
+    assert book.ids.allocate() == 1
+
+
+def test_id_allocator_matches_scan():
+    for seed in range(50):
+        rnd = random.Random(seed)
+        allocator = IdAllocator()
+        used = set()
+        for step in range(300):
+            free = [item_id for item_id in range(1, allocator.next_id) if item_id not in used]
+            action = rnd.randrange(4)
+            if action == 0:
+                item_id = allocator.allocate()
+                assert item_id == (free[0] if free else allocator.next_id - 1), (seed, step)
+                used.add(item_id)
+            elif action == 1 and used:
+                item_id = rnd.choice(sorted(used))
+                allocator.release(item_id)
+                used.remove(item_id)
+            elif action == 2:
+                item_id = rnd.choice(free + [allocator.next_id + rnd.randrange(20)])
+                allocator.claim(item_id)
+                used.add(item_id)
+            else:
+                reserved = allocator.reserve(rnd.randrange(4))
+                assert reserved[:len(free)] == free[:len(reserved)] and not used & set(reserved), (seed, step)
+                used.update(reserved)
+            assert len(allocator) == len(used), (seed, step)
+
+
+def test_claim_far_above_next_id_keeps_one_gap():
+    allocator = IdAllocator()
+    allocator.claim(3_000_000)
+    allocator.claim(5)
+    assert len(allocator.gaps) == 1 and len(allocator) == 2
+    assert [allocator.allocate() for _ in range(5)] == [1, 2, 3, 4, 6]
+    book = AddressBook()
+    for record_id in (0, 1 << 32, "7"):
+        with pytest.raises(ValueError):
+            book[record_id] = Record(Name("Jan Kowalski"))
+    book[1 << 20] = Record(Name("Jan Kowalski"))
+    assert ids(book.find_record("Kowal")) == [1 << 20] and book.ids.allocate() == 1
+
+
+def test_edited_note_is_searchable():
+    book = AddressBook()
+    record = Record(Name("Jan Kowalski"))
+    record.add_note(Note("oddzwonić w sprawie faktury"))
+    book.add_record(record)
+    record.edit_note(record.notes[0], Note("reklamacja przyjęta"))
+    assert ids(book.find_notes("reklamacja")) == [record.id]
+    assert ids(book.find_record("reklamacja")) == [record.id]
+    assert book.find_notes("faktury") == []
+
+
+def test_note_edited_in_menu_is_searchable(monkeypatch):
+    book = AddressBook()
+    record = Record(Name("Jan Kowalski"))
+    record.add_note(Note("oddzwonić w sprawie faktury"))
+    book.add_record(record)
+    answers = {"imię i nazwisko": "Jan Kowalski", "notatkę do edycji": "1", "nową treść notatki": "reklamacja przyjęta"}
+    monkeypatch.setattr("builtins.input", lambda prompt: next(
+        (answer for question, answer in answers.items() if question in prompt), ""))
+    edit_record(book)
+    assert ids(book.find_notes("reklamacja")) == [record.id]
+    assert book.find_notes("faktury") == []
+
+
+def test_rename_tag_updates_every_record():
+    book = AddressBook()
+    for name, tags in (("Jan Kowalski", ["klient"]), ("Anna Nowak", ["klient", "vip"]), ("Ewa Lis", ["vip"])):
+        record = Record(Name(name))
+        for tag in tags:
+            record.add_tag(Tag(tag))
+        book.add_record(record)
+    book.rename_tag("klient", "vip")
+    assert ids(book.find_by_tags(all_of=["vip"])) == [1, 2, 3]
+    assert book.find_by_tags(all_of=["klient"]) == []
+    book.rename_tag("klient", "stały")  # Ponowna zmiana nazwy, np. przy odtwarzaniu dziennika
+    assert sorted(book.tag_registry) == ["vip"]
+
+
+def test_tags_are_removed_and_edited_by_name():
+    book = AddressBook()
+    first, second = Record(Name("Jan Kowalski")), Record(Name("Anna Nowak"))
+    book.add_records([first, second])
+    tag = Tag("klient")
+    first.add_tag(tag)
+    second.add_tag(Tag("klient"))
+    book.rename_tag("klient", "vip")
+    assert tag.name == "klient"  # Zmiana nazwy nie dotyka obiektu podanego przez wywołującego
+    first.edit_tag(Tag("vip"), Tag("praca"))
+    second.remove_tag(Tag("vip"))
+    assert ids(book.find_by_tags(all_of=["praca"])) == [first.id]
+    assert book.find_by_tags(any_of=["vip", "klient"]) == []
+    assert sorted(book.tag_registry) == ["praca"]
+    with pytest.raises(ValueError):
+        second.remove_tag(tag)
@@ -0,0 +1,124 @@
+import random
+
+import pytest
+
+import journal as journal_module
+from AddresBook_Levenshtein import AddressBook, Name, Note, Record, Tag
+from generator import generate_records
+from journal import Journal
+
+
+def open_book(path):
+    journal = Journal(path, AddressBook)
+    book = journal.load()
+    book.journal = journal
+    return book, journal
+
+
+def tags_by_record(book):
+    return {record_id: sorted(tag.name for tag in record.tags) for record_id, record in book.data.items()}
+
+
+@pytest.mark.parametrize("renames", [
+    [("klient", "vip")],
+    [("klient", "vip"), ("znajomi", "klient")],
+    [("klient", "tmp"), ("vip", "klient"), ("tmp", "vip")],
+])
+def test_renames_replay_after_crash_before_segments_are_removed(tmp_path, monkeypatch, renames):
+    path = str(tmp_path / "book.pickle")
+    book, journal = open_book(path)
+    for name, tags in (("Jan Kowalski", ["klient"]), ("Anna Nowak", ["vip"]), ("Ewa Lis", ["znajomi", "klient"])):
+        record = Record(Name(name))
+        for tag in tags:
+            record.add_tag(Tag(tag))
+        book.add_record(record)
+    journal.compact(wait=True)
+    for old_name, new_name in renames:
+        book.rename_tag(old_name, new_name)
+    expected = tags_by_record(book)
+
+    # Proces ginie po zapisaniu migawki, a przed usunięciem zapieczętowanych segmentów
+    monkeypatch.setattr(journal_module.os, "remove", lambda path: None)
+    journal.compaction_lock.acquire()
+    journal.seal()
+    journal.fold_segments()
+    journal.close(compact=False)
+    monkeypatch.undo()
+    assert journal.sealed_segments()
+
+    for close in (dict(compact=True), dict(compact=False)):
+        book, journal = open_book(path)
+        try:
+            assert tags_by_record(book) == expected
+            for name in {name for names in expected.values() for name in names}:
+                assert [found.id for found in book.find_by_tags(all_of=[name])] == sorted(
+                    record_id for record_id, names in expected.items() if name in names)
+            assert sorted(book.tag_registry) == sorted({name for names in expected.values() for name in names})
+        finally:
+            journal.close(**close)
+    assert journal.sealed_segments() == []
+
+
+def snapshot(book):
+    return {record_id: str(record) for record_id, record in book.data.items()}
+
+
+def test_reload_replays_every_change(tmp_path):
+    path = str(tmp_path / "book.pickle")
+    book, journal = open_book(path)
+    journal.compact_after = 50  # Kompakcje w trakcie zmian, także między segmentami
+    book.add_records(generate_records(120, seed=3))
+    rnd = random.Random(3)
+    for step in range(200):
+        record = book.data[rnd.choice(sorted(book.data))]
+        action = step % 5
+        if action == 0:
+            book.remove_record(record.id)
+        elif action == 1:
+            book.add_record(next(generate_records(1, seed=step)))
+        elif action == 2:
+            record.edit_name(Name(record.name.value + "a"))
+        elif action == 3:
+            record.add_tag(Tag("vip"))
+        else:
+            record.add_note(Note(f"Notatka {step}"))
+    book.rename_tag("vip", "klient")
+    expected = snapshot(book)
+    tagged = [record.id for record in book.find_by_tags(all_of=["klient"])]
+    journal.close(compact=False)
+
+    book, journal = open_book(path)
+    try:
+        assert snapshot(book) == expected
+        assert [record.id for record in book.find_by_tags(all_of=["klient"])] == tagged
+        assert list(book.sorted_ids) == sorted(expected)
+        assert [record.id for record in book.find_notes("notatka")] and book.find_by_tags(all_of=["vip"]) == []
+    finally:
+        journal.close()
+    book, journal = open_book(path)
+    try:
+        assert snapshot(book) == expected
+    finally:
+        journal.close(compact=False)
+
+
+def test_torn_last_entry_is_dropped(tmp_path):
+    path = str(tmp_path / "book.pickle")
+    book, journal = open_book(path)
+    book.add_records(generate_records(10))
+    expected = snapshot(book)
+    journal.close(compact=False)
+    with open(journal.journal_path, "ab") as file:
+        file.write(b"\x80\x04\x95")  # Początek zapisu przerwanego awarią
+
+    book, journal = open_book(path)
+    try:
+        assert snapshot(book) == expected
+        book.add_record(Record(Name("Jan Kowalski")))
+    finally:
+        journal.close(compact=False)
+    book, journal = open_book(path)
+    try:
+        assert len(book) == 11
+    finally:
+        journal.close(compact=False)
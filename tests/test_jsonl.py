@@ -0,0 +1,68 @@
+"""Sharded JSON Lines export and import compared with a record-by-record model."""
+import json
+from itertools import count
+
+import pytest
+
+from AddresBook_Levenshtein import AddressBook
+from generator import generate_records
+from jsonl import export_jsonl, import_jsonl
+
+
+def contents(book):
+    return {record_id: record.to_dict() for record_id, record in book.data.items()}
+
+
+def read_lines(paths):
+    lines = []
+    for path in paths:
+        with open(path, encoding="utf-8") as file:
+            lines += [json.loads(line) for line in file]
+    return lines
+
+
+def churned(size, seed):
+    book = AddressBook()
+    book.add_records(generate_records(size, seed))
+    for record_id in range(2, size, 3):
+        book.remove_record(record_id)
+    return book
+
+
+@pytest.mark.parametrize("size, shards", [(0, 3), (1, 4), (5, 8), (40, 3), (300, 7)])
+def test_export_then_import_keeps_every_record(tmp_path, size, shards):
+    book = churned(size, seed=size)
+    paths = export_jsonl(book, str(tmp_path / "kontakty.jsonl"), shards)
+    assert len(paths) == shards
+    lines = read_lines(paths)
+    assert [line["id"] for line in lines] == sorted(book.data)
+    assert {line["id"]: line for line in lines} == contents(book)
+
+    copy = AddressBook()
+    assert import_jsonl(copy, str(tmp_path / "kontakty.jsonl"), workers=2) == len(book)
+    assert contents(copy) == contents(book)
+    assert list(copy.sorted_ids) == sorted(book.data)
+
+
+def test_colliding_and_invalid_ids_get_fresh_ones(tmp_path):
+    exported = churned(60, seed=1)
+    records = [record.to_dict() for record in exported.data.values()]
+    for line, record_id in zip(records, (1, 1, 0, -5, 1 << 32, AddressBook.MAX_ID + 1, "7", None, 3, 3)):
+        line["id"] = record_id
+    path = tmp_path / "kontakty.jsonl"
+    path.write_text("".join(json.dumps(line, ensure_ascii=False) + "\n" for line in records), encoding="utf-8")
+
+    book = churned(30, seed=2)
+    used = set(book.data)
+    expected = contents(book)
+    for line in records:
+        record_id = line["id"]
+        if not isinstance(record_id, int) or not 1 <= record_id <= AddressBook.MAX_ID or record_id in used:
+            record_id = next(free for free in count(1) if free not in used)
+        used.add(record_id)
+        expected[record_id] = {**line, "id": record_id}
+
+    assert import_jsonl(book, str(path), workers=2) == len(records)
+    assert contents(book) == expected
+    assert list(book.sorted_ids) == sorted(expected)
+    assert book.ids.allocate() == next(free for free in count(1) if free not in used)
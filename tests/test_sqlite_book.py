@@ -0,0 +1,74 @@
+"""SQLiteAddressBook answers the same queries as the in-memory AddressBook."""
+from datetime import date
+
+import pytest
+
+from AddresBook_Levenshtein import AddressBook, Name, Note, Record
+from generator import generate_records
+from sqlite_book import SQLiteAddressBook
+
+
+@pytest.fixture(scope="module")
+def books(tmp_path_factory):
+    memory = AddressBook()
+    memory.add_records(generate_records(800, seed=5))
+    sqlite = SQLiteAddressBook(str(tmp_path_factory.mktemp("sqlite") / "book.db"))
+    sqlite.add_records(generate_records(800, seed=5))
+    for record_id in range(1, 800, 9):
+        memory.remove_record(record_id)
+        sqlite.remove_record(record_id)
+    yield memory, sqlite
+    sqlite.close()
+
+
+def ids(records):
+    return [record.id for record in records]
+
+
+def test_find_record(books):
+    memory, sqlite = books
+    phone = memory.data[2].phones[0].value
+    for term in ("Kowal", "łuk", "an", "60", "@wp.pl", "Łódź", "lodz", "w sprawie", "faktury", phone,
+                 phone[:3] + "*", "*" + phone[-4:], f"*{phone[2:5]}*", f"*{phone[4:6]}*", "90-xxx", "30-0xx"):
+        assert ids(sqlite.find_record(term)) == ids(memory.find_record(term)), term
+
+
+def test_find_notes(books):
+    memory, sqlite = books
+    for query in ("faktury", "reklamacja kurier", '"w sprawie faktury"', "a-b", "faktur?", '"oddzwonić', "!!!"):
+        assert ids(sqlite.find_notes(query)) == ids(memory.find_notes(query)), query
+        assert ids(sqlite.find_notes(query, k=5)) == ids(memory.find_notes(query, k=5)), query
+
+
+def test_notes_match_whole_stems_and_rank_per_record(tmp_path):
+    memory = AddressBook()
+    sqlite = SQLiteAddressBook(str(tmp_path / "book.db"))
+    try:
+        for name, notes in (("Jan Kowalski", ["kotlet schabowy", "fakturowanie co miesiąc"]),
+                            ("Anna Nowak", ["mam kota", "kot i pies"]), ("Ewa Lis", ["faktura", "kot"]),
+                            ("Piotr Wójcik", ["kot kot kot w notatce o kotach"])):
+            for book in (memory, sqlite):
+                record = Record(Name(name))
+                for note in notes:
+                    record.add_note(Note(note))
+                book.add_record(record)
+        for query in ("kot", "kotlet", "faktura", "fakturowanie", '"kot i"', '"kot" "faktura"', "kot faktura"):
+            assert ids(sqlite.find_notes(query)) == ids(memory.find_notes(query)), query
+            assert ids(sqlite.find_record(query)) == ids(memory.find_record(query)), query
+        assert ids(sqlite.find_notes("kot")) == [4, 2, 3]
+    finally:
+        sqlite.close()
+
+
+def test_find_by_tags_and_address(books):
+    memory, sqlite = books
+    for query in ((("klient",), (), ()), ((), ("vip", "praca"), ("rodzina",)), ((), (), ())):
+        assert ids(sqlite.find_by_tags(*query)) == ids(memory.find_by_tags(*query))
+    for query in ({"city": "lodz"}, {"postal_code": "00-xxx"}, {"city": "Kraków", "country": "polska"}):
+        assert ids(sqlite.find_by_address(**query)) == ids(memory.find_by_address(**query))
+
+
+def test_upcoming_birthdays(books):
+    memory, sqlite = books
+    for today in (date(2023, 2, 27), date(2023, 12, 20)):
+        assert ids(sqlite.upcoming_birthdays(30, today)) == ids(memory.upcoming_birthdays(30, today))
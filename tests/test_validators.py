@@ -0,0 +1,52 @@
+"""validate_many compared with validating every value on its own."""
+import random
+import re
+from datetime import datetime
+
+import pytest
+
+from AddresBook_Levenshtein import validate_many
+
+
+def strptime_valid(value):
+    try:
+        datetime.strptime(value, "%Y-%m-%d")
+        return True
+    except ValueError:
+        return False
+
+
+SCANS = {
+    "phone": lambda value: re.fullmatch(r"[0-9]{9}", value) is not None,
+    "email": lambda value: re.match(r"^[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+$", value) is not None,
+    "birthday": strptime_valid,
+}
+
+VALUES = {
+    "phone": ["601234567", "60123456", "6012345678", "601 234 567", "+48601234567", "60123456a", "٠١٢٣٤٥٦٧٨",
+              "", "000000000"],
+    "email": ["jan.kowalski@wp.pl", "jan@wp", "jan@@wp.pl", "@wp.pl", "jan kowalski@wp.pl", "jan+x@mail.co.uk",
+              "JAN@WP.PL", "", "łukasz@wp.pl", "jan@wp.pl "],
+    "birthday": ["1990-02-28", "1990-02-29", "1992-02-29", "1990-02-30", "1990-13-01", "1990-00-10", "1990-04-31",
+                 "1990-4-3", "1990-04-03 ", "19900403", "0000-01-01", "9999-12-31", "1990-1২-01", "", "abcd-ef-gh"],
+}
+
+
+def random_values(kind, rnd, count):
+    alphabets = {"phone": "0123456789 -a", "email": "ab.@-+_1", "birthday": "0123456789-"}
+    lengths = {"phone": (8, 10), "email": (3, 12), "birthday": (8, 11)}
+    return ["".join(rnd.choice(alphabets[kind]) for _ in range(rnd.randint(*lengths[kind]))) for _ in range(count)]
+
+
+@pytest.mark.parametrize("kind", sorted(SCANS))
+def test_validate_many_matches_scan(kind):
+    rnd = random.Random(kind)
+    values = VALUES[kind] + random_values(kind, rnd, 2000)
+    if kind == "birthday":
+        values += [f"{rnd.randint(1900, 2030)}-{rnd.randint(0, 13):02d}-{rnd.randint(0, 32):02d}" for _ in range(2000)]
+    assert validate_many(kind, values) == [not SCANS[kind](value) for value in values]
+
+
+def test_validate_many_rejects_unknown_kind():
+    with pytest.raises(ValueError):
+        validate_many("postal_code", ["00-950"])
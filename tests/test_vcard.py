@@ -0,0 +1,73 @@
+"""vCard export read back and compared with the records it was written from."""
+import io
+
+import pytest
+
+from AddresBook_Levenshtein import Address, AddressBook, Birthday, Email, Name, Note, Phone, Record, Tag
+from generator import generate_records
+from vcard import LINE_OCTETS, export_vcf, import_vcf, read_vcards, write_vcards
+
+
+def nasty_records():
+    record = Record(Name("Zażółć, Gęślą; Jaźń\\"), Birthday("1984-02-29"))
+    record.add_phone(Phone("601234567"))
+    record.add_phone(Phone("512345678"))
+    record.add_email(Email("jan.kowalski+vcard@wp.pl"))
+    record.add_address(Address("ul. Długa 1; m. 2, klatka \\B", "Łódź", "90-001", "Polska"))
+    record.add_note(Note("Pierwsza linia\nDruga linia; z przecinkiem, i ukośnikiem \\n"))
+    record.add_note(Note("ż" * 200))
+    record.add_note(Note("x" * 74 + "ó" * 3 + "😀" * 40))
+    record.add_tag(Tag("klient, stały"))
+    record.add_tag(Tag("vip;praca"))
+    record.add_tag(Tag("a\\b"))
+    return [record, Record(Name("Jan"))]
+
+
+def contents(records):
+    return [{key: value for key, value in record.to_dict().items() if key != "id"} for record in records]
+
+
+@pytest.mark.parametrize("version", ["3.0", "4.0"])
+def test_round_trip_keeps_every_field(version):
+    records = nasty_records() + list(generate_records(300, seed=11))
+    file = io.StringIO(newline="")
+    assert write_vcards(records, file, version) == len(records)
+    text = file.getvalue()
+
+    lines = text.split("\r\n")
+    assert lines[-1] == ""
+    assert all(len(line.encode("utf-8")) <= LINE_OCTETS for line in lines)
+    phones = [line for line in lines if line.startswith("TEL")]
+    assert len(phones) == sum(len(record.phones) for record in records)
+    if version == "4.0":
+        assert all(line.startswith("TEL;VALUE=uri:tel:+48") for line in phones)
+    else:
+        assert all(line.startswith("TEL;TYPE=CELL:") and line[14:].isdigit() for line in phones)
+
+    errors = []
+    read = list(read_vcards(io.StringIO(text, newline=""), errors.append))
+    assert errors == []
+    assert contents(read) == contents(records)
+
+
+def test_export_and_import_through_files(tmp_path):
+    book = AddressBook()
+    book.add_records(nasty_records() + list(generate_records(200, seed=12)))
+    path = str(tmp_path / "kontakty.vcf")
+    assert export_vcf(book, path, "4.0") == len(book)
+    copy = AddressBook()
+    assert import_vcf(copy, path, batch_size=7) == len(book)
+    assert contents(copy.data[record_id] for record_id in sorted(copy.data)) == contents(
+        book.data[record_id] for record_id in sorted(book.data))
+
+
+def test_invalid_values_are_reported_and_skipped():
+    text = "\r\n".join([
+        "BEGIN:VCARD", "VERSION:3.0", "N:Kowalski;Jan;;;", "TEL:12", "TEL;TYPE=CELL:+48 601 234 567",
+        "EMAIL:zły", "BDAY:1990-02-30", "BDAY:--0412", "NOTE:Dłu", " ga notatka", "END:VCARD",
+        "BEGIN:VCARD", "VERSION:4.0", "TEL;VALUE=uri:tel:601234567", "END:VCARD", ""])
+    errors = []
+    records = list(read_vcards(io.StringIO(text, newline=""), errors.append))
+    assert contents(records) == [{"name": "Jan Kowalski", "birthday": None, "phones": ["601234567"], "emails": [],
+                                  "address": None, "tags": [], "notes": ["Długa notatka"]}]
+    assert len(errors) == 4
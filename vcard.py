@@ -0,0 +1,275 @@
+"""Streaming vCard 3.0/4.0 import and export for address books.
+
+    python vcard.py import kontakty.vcf
+    python vcard.py export kontakty.vcf --version 4.0
+
+Cards map to records as: FN (or N) -> name, TEL -> phones, EMAIL ->
+emails, BDAY -> birthday, ADR -> address, NOTE -> notes and CATEGORIES ->
+tags. Values that fail validation are skipped and reported, the rest of
+the card is still imported.
+"""
+import argparse
+import sys
+from itertools import islice
+
+from AddresBook_Levenshtein import Address, AddressBook, Birthday, Email, Name, Note, Phone, Record, Tag
+from journal import Journal
+
+VERSIONS = ("3.0", "4.0")
+LINE_OCTETS = 75  # Longest line before folding, in UTF-8 bytes, as RFC 6350 asks
+WRITE_CARDS = 1000  # Cards joined into one write() call
+BATCH_SIZE = 10_000
+
+
+def unfold(lines):
+    """Yields logical lines, joining folded continuation lines that start with a space or tab."""
+    current = None
+    for line in lines:
+        line = line.rstrip("\r\n")
+        if line[:1] in (" ", "\t") and current is not None:
+            current += line[1:]
+            continue
+        if current:
+            yield current
+        current = line
+    if current:
+        yield current
+
+
+def split_escaped(value, separator):
+    """Splits a value on separators that are not escaped with a backslash, keeping the escapes."""
+    parts, current, escaped = [], [], False
+    for char in value:
+        if escaped:
+            current.append(char)
+            escaped = False
+        elif char == "\\":
+            current.append(char)
+            escaped = True
+        elif char == separator:
+            parts.append("".join(current))
+            current = []
+        else:
+            current.append(char)
+    parts.append("".join(current))
+    return parts
+
+
+def unescape(value):
+    """Resolves the \\n, \\, \\; and \\\\ escapes of a text value."""
+    if "\\" not in value:
+        return value
+    chars, escaped = [], False
+    for char in value:
+        if escaped:
+            chars.append("\n" if char in "nN" else char)
+            escaped = False
+        elif char == "\\":
+            escaped = True
+        else:
+            chars.append(char)
+    return "".join(chars)
+
+
+def escape(value):
+    """Escapes a text value for a vCard property."""
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace(",", "\\,").replace(";", "\\;")
+
+
+def split_property(line):
+    """Returns (NAME, params, value) of a content line, dropping any group prefix."""
+    quoted = False
+    for position, char in enumerate(line):
+        if char == '"':
+            quoted = not quoted
+        elif char == ":" and not quoted:
+            break
+    else:
+        return None, {}, ""
+    name, *params = line[:position].split(";")
+    parsed = {}
+    for param in params:
+        key, _, value = param.partition("=")
+        parsed[key.upper()] = value.strip('"')
+    return name.rsplit(".", 1)[-1].upper(), parsed, line[position + 1:]
+
+
+def parse_birthday(value):
+    """Returns a YYYY-MM-DD date from a vCard BDAY, or None for dates without a year."""
+    value = value.split("T", 1)[0]
+    if len(value) == 8 and value.isdigit():
+        value = f"{value[:4]}-{value[4:6]}-{value[6:]}"
+    return value if not value.startswith("--") else None
+
+
+def read_vcards(lines, on_error=None):
+    """Yields one Record per vCard read from an iterable of lines, such as an open file.
+
+    Only the card being parsed is held in memory. Values that cannot be
+    stored, and cards without a name, are passed to on_error(message)
+    and skipped.
+    """
+    properties = None
+    for line in unfold(lines):
+        name, params, value = split_property(line)
+        if name == "BEGIN" and value.upper() == "VCARD":
+            properties = []
+        elif name == "END" and value.upper() == "VCARD" and properties is not None:
+            record = build_record(properties, on_error)
+            if record is not None:
+                yield record
+            properties = None
+        elif properties is not None and name is not None:
+            properties.append((name, params, value))
+
+
+def build_record(properties, on_error):
+    """Builds a Record from the (NAME, params, value) properties of one card."""
+    def report(message):
+        if on_error is not None:
+            on_error(message)
+
+    full_name = next((unescape(value) for name, params, value in properties if name == "FN"), "").strip()
+    if not full_name:
+        structured = next((value for name, params, value in properties if name == "N"), "")
+        family, given = (list(map(unescape, split_escaped(structured, ";"))) + ["", ""])[:2]
+        full_name = f"{given} {family}".strip()
+    if not full_name:
+        report("Pominięto wizytówkę bez imienia i nazwiska")
+        return None
+    record = Record(Name(full_name))
+    for name, params, value in properties:
+        try:
+            if name == "TEL":
+                number = value[4:] if value.lower().startswith("tel:") else unescape(value)
+                record.add_phone(Phone(Phone.normalize(number) or number))
+            elif name == "EMAIL":
+                record.add_email(Email(unescape(value).strip()))
+            elif name == "BDAY":
+                birthday = parse_birthday(value.strip())
+                if birthday is not None:
+                    record.edit_birthday(Birthday(birthday))
+            elif name == "ADR":
+                parts = (list(map(unescape, split_escaped(value, ";"))) + [""] * 7)[:7]
+                post_box, extended, street, city, region, postal_code, country = parts
+                record.add_address(Address(street, city, postal_code, country))
+            elif name == "NOTE":
+                record.add_note(Note(unescape(value)))
+            elif name == "CATEGORIES":
+                for category in split_escaped(value, ","):
+                    if unescape(category).strip():
+                        record.add_tag(Tag(unescape(category).strip()))
+        except ValueError as error:
+            report(f"{full_name}: {name} {value!r} - {error}")
+    return record
+
+
+def fold(line):
+    """Folds a content line to LINE_OCTETS bytes per line, never splitting a character."""
+    if len(line.encode("utf-8")) <= LINE_OCTETS:
+        return line + "\r\n"
+    parts, current, size = [], [], 0
+    for char in line:
+        width = len(char.encode("utf-8"))
+        if size + width > LINE_OCTETS:
+            parts.append("".join(current))
+            current, size = [" "], 1
+        current.append(char)
+        size += width
+    parts.append("".join(current))
+    return "\r\n".join(parts) + "\r\n"
+
+
+def card_lines(record, version="3.0"):
+    """Returns the content lines of one record as a vCard."""
+    given, _, family = record.name.value.rpartition(" ")
+    lines = ["BEGIN:VCARD", f"VERSION:{version}", f"FN:{escape(record.name.value)}",
+             f"N:{escape(family)};{escape(given)};;;"]
+    for phone in record.phones:
+        lines.append(f"TEL;VALUE=uri:tel:+48{phone.value}" if version == "4.0" else f"TEL;TYPE=CELL:{phone.value}")
+    for email in record.emails:
+        lines.append(f"EMAIL:{email.value}")
+    if record.birthday is not None:
+        lines.append(f"BDAY:{record.birthday.value}")
+    if record.address is not None:
+        address = record.address
+        components = ("", "", address.street, address.city, "", address.postal_code, address.country)
+        lines.append("ADR:" + ";".join(map(escape, components)))
+    for note in record.notes:
+        lines.append(f"NOTE:{escape(note.value)}")
+    if record.tags:
+        lines.append("CATEGORIES:" + ",".join(escape(tag.name) for tag in record.tags))
+    lines.append("END:VCARD")
+    return lines
+
+
+def write_vcards(records, file, version="3.0"):
+    """Writes records to a text file as vCards and returns how many were written.
+
+    Cards are formatted in chunks of WRITE_CARDS and each chunk goes to the
+    file in a single write() call. Records may be any iterable, so a whole
+    book can be streamed without building the output in memory.
+    """
+    if version not in VERSIONS:
+        raise ValueError(f"Nieobsługiwana wersja vCard: {version}")
+    written = 0
+    records = iter(records)
+    while True:
+        chunk = list(islice(records, WRITE_CARDS))
+        if not chunk:
+            return written
+        file.write("".join(fold(line) for record in chunk for line in card_lines(record, version)))
+        written += len(chunk)
+
+
+def import_vcf(book, path, batch_size=BATCH_SIZE, on_error=None):
+    """Streams a .vcf file into the book in batches and returns the number of records added."""
+    added = 0
+    with open(path, encoding="utf-8", newline="") as file:
+        cards = read_vcards(file, on_error)
+        while True:
+            batch = list(islice(cards, batch_size))
+            if not batch:
+                return added
+            book.add_records(batch)
+            added += len(batch)
+
+
+def export_vcf(book, path, version="3.0"):
+    """Writes every record of the book to a .vcf file, page by page, and returns the count."""
+    records = (record for page in book.cursor(page_size=WRITE_CARDS) for record in page)
+    with open(path, "w", encoding="utf-8", newline="") as file:
+        return write_vcards(records, file, version)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("command", choices=("import", "export"))
+    parser.add_argument("path", help="plik .vcf")
+    parser.add_argument("--version", choices=VERSIONS, default="3.0", help="wersja vCard przy eksporcie")
+    parser.add_argument("--sqlite", metavar="PLIK", help="korzystaj z bazy SQLite zamiast z pliku pickle")
+    args = parser.parse_args()
+
+    if args.sqlite:
+        from sqlite_book import SQLiteAddressBook
+        book = SQLiteAddressBook(args.sqlite)
+    else:
+        journal = Journal("address_book.pickle", AddressBook)
+        book = journal.load()
+        book.journal = journal
+    try:
+        if args.command == "import":
+            count = import_vcf(book, args.path, on_error=lambda message: print(message, file=sys.stderr))
+            print(f"Zaimportowano {count} wizytówek.")
+        else:
+            count = export_vcf(book, args.path, args.version)
+            print(f"Wyeksportowano {count} wizytówek.")
+    finally:
+        if args.sqlite:
+            book.close()
+        else:
+            journal.close()
+
+
+if __name__ == "__main__":
+    main()